@@ -5,59 +5,470 @@
 用于清空input或output文件夹内的文件
 """
 
+import argparse
+import errno
+import functools
+import itertools
 import os
+import platform
+import stat
+import struct
 import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-def clear_folder(folder_path, folder_name):
-    """清空指定文件夹内的所有文件"""
-    folder = Path(folder_path)
+# 删除操作受限于文件系统元数据延迟而非CPU，线程数可以超过核心数
+DEFAULT_THREADS = min(32, (os.cpu_count() or 1) * 4)
+
+# 超过该数量时只显示前LISTING_SAMPLE个条目
+LISTING_LIMIT = 200
+LISTING_SAMPLE = 10
+
+# 递归清空时默认跳过的子目录
+_PRUNED_DIRS = frozenset({'.git'})
+
+# Linux各架构的getdents64系统调用号，按 (架构族, 指针字节数) 区分：
+# 系统调用号取决于Python进程的ABI而不是内核架构（如64位内核上的32位Python）
+_SYS_GETDENTS64 = {
+    ('x86', 8): 217, ('x86', 4): 220,
+    ('arm', 8): 61, ('arm', 4): 217,
+    ('riscv', 8): 61,
+    ('ppc', 8): 202, ('ppc', 4): 202,
+}
+_GETDENTS_BUF_SIZE = 5 * 1024 * 1024
+_DT_UNKNOWN, _DT_DIR, _DT_REG = 0, 4, 8
+# struct linux_dirent64 的定长头部: d_ino, d_off, d_reclen, d_type
+_DIRENT64_HEAD = struct.Struct('=QqHB')
+
+# 删除时可以忽略的错误：文件已被他人删除，或在竞争中变成了目录
+_IGNORED_UNLINK_ERRNOS = frozenset({errno.ENOENT, errno.EISDIR})
+
+def _unlink_batch(names, dir_fd=None):
+    """在一个任务内连续删除一批文件，返回 [(路径或文件名, 错误), ...]"""
+    errors = []
+    unlink = os.unlink
+    for name in names:
+        try:
+            unlink(name, dir_fd=dir_fd)
+        except OSError as e:
+            if e.errno not in _IGNORED_UNLINK_ERRNOS:
+                errors.append((name, e))
+    return errors
+
+def _unlink_files(folder_path, files, threads):
+    """并行删除 [(文件名, 路径), ...] 中的文件，返回 [(路径或文件名, 错误), ...]
+    
+    文件按批次分给各个线程，每个任务在紧凑的循环里连续删除，
+    避免为每个文件创建一个Future。在支持dir_fd的平台上只打开一次
+    目录并按文件名相对删除，内核无需为每个文件重新解析完整路径。
+    """
+    workers = max(1, threads)
+    use_dir_fd = os.unlink in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY')
+    targets = [name if use_dir_fd else path for name, path in files]
+    
+    # 每个线程分到若干批，兼顾负载均衡和调度开销
+    batch_size = max(1, -(-len(targets) // (workers * 4)))
+    batches = [targets[i:i + batch_size] for i in range(0, len(targets), batch_size)]
+    
+    dfd = os.open(folder_path, os.O_RDONLY | os.O_DIRECTORY) if use_dir_fd else None
+    try:
+        unlink = functools.partial(_unlink_batch, dir_fd=dfd)
+        if len(batches) <= 1:
+            return [err for batch in batches for err in unlink(batch)]
+        with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as ex:
+            return [err for errs in ex.map(unlink, batches) for err in errs]
+    finally:
+        if dfd is not None:
+            os.close(dfd)
+
+def _sync_folder(folder_path):
+    """全部删除完成后统一把元数据落盘一次
+    
+    删除过程中不做任何逐文件的同步，文件系统可以合并日志提交；
+    Linux下只同步该目录所在的文件系统（syncfs），其他平台回退到os.sync。
+    代价是删除中途崩溃可能残留部分文件，重新运行即可。
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            dfd = os.open(folder_path, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                if libc.syncfs(dfd) == 0:
+                    return
+            finally:
+                os.close(dfd)
+        except (OSError, AttributeError):
+            pass
+    if hasattr(os, 'sync'):
+        os.sync()
+
+def _shell_delete(paths):
+    """Windows下通过一次SHFileOperationW调用批量删除文件，成功返回True"""
+    import ctypes
+    from ctypes import wintypes
+    
+    class SHFILEOPSTRUCTW(ctypes.Structure):
+        # shellapi.h在32位Windows下以1字节对齐声明该结构体
+        if ctypes.sizeof(ctypes.c_void_p) == 4:
+            _pack_ = 1
+        _fields_ = [
+            ("hwnd", wintypes.HWND),
+            ("wFunc", wintypes.UINT),
+            ("pFrom", wintypes.LPCWSTR),
+            ("pTo", wintypes.LPCWSTR),
+            ("fFlags", ctypes.c_ushort),
+            ("fAnyOperationsAborted", wintypes.BOOL),
+            ("hNameMappings", ctypes.c_void_p),
+            ("lpszProgressTitle", wintypes.LPCWSTR),
+        ]
+    
+    FO_DELETE = 0x0003
+    FOF_SILENT = 0x0004
+    FOF_NOCONFIRMATION = 0x0010
+    FOF_NOCONFIRMMKDIR = 0x0200
+    FOF_NOERRORUI = 0x0400
+    FOF_NO_UI = FOF_SILENT | FOF_NOCONFIRMATION | FOF_NOERRORUI | FOF_NOCONFIRMMKDIR
+    
+    try:
+        # pFrom 为以双空字符结尾的绝对路径列表
+        buf = ctypes.create_unicode_buffer("\0".join(os.path.abspath(p) for p in paths) + "\0")
+        op = SHFILEOPSTRUCTW()
+        op.wFunc = FO_DELETE
+        op.pFrom = ctypes.cast(buf, wintypes.LPCWSTR)
+        op.fFlags = FOF_NO_UI
+        result = ctypes.windll.shell32.SHFileOperationW(ctypes.byref(op))
+        return result == 0 and not op.fAnyOperationsAborted
+    except Exception:
+        return False
+
+def _write_lines(lines):
+    """一次性写出多行文本，避免逐行print带来的锁和系统调用开销"""
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+
+def _keep_dir_name(name):
+    """子目录名是否需要处理（跳过.git目录），两种目录扫描方式共用"""
+    return name not in _PRUNED_DIRS
+
+def _default_dir_filter(entry):
+    """默认的子目录过滤器：跳过.git目录"""
+    return _keep_dir_name(entry.name)
+
+def _arch_family():
+    """由platform.machine()得到架构族，未知架构返回None"""
+    machine = platform.machine().lower()
+    if machine in ('x86_64', 'amd64') or (machine.startswith('i') and machine.endswith('86')):
+        return 'x86'
+    if machine.startswith(('arm', 'aarch64')):
+        return 'arm'
+    if machine.startswith('riscv'):
+        return 'riscv'
+    if machine.startswith(('ppc', 'powerpc')):
+        return 'ppc'
+    return None
+
+def _getdents(folder_path):
+    """Linux下通过getdents64系统调用批量读取目录项
+    
+    一次系统调用可取回数千个目录项，且不为每个文件创建DirEntry对象。
+    
+    Returns:
+        [(inode, 文件名, d_type), ...]；当前平台不支持或系统调用失败时返回None，
+        由调用方回退到os.scandir
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        nr = _SYS_GETDENTS64.get((_arch_family(), ctypes.sizeof(ctypes.c_void_p)))
+        if nr is None:
+            return None
+        libc = ctypes.CDLL(None, use_errno=True)
+        syscall = libc.syscall
+        # 系统调用的参数均按long传递
+        syscall.restype = ctypes.c_long
+        syscall.argtypes = [ctypes.c_long, ctypes.c_long, ctypes.c_void_p, ctypes.c_long]
+    except (OSError, AttributeError):
+        return None
+    
+    buf = ctypes.create_string_buffer(_GETDENTS_BUF_SIZE)
+    head_size = _DIRENT64_HEAD.size
+    result = []
+    dfd = os.open(folder_path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        while True:
+            nread = syscall(nr, dfd, buf, _GETDENTS_BUF_SIZE)
+            if nread < 0:
+                return None
+            if nread == 0:
+                break
+            data = ctypes.string_at(buf, nread)
+            offset = 0
+            while offset < nread:
+                d_ino, _, d_reclen, d_type = _DIRENT64_HEAD.unpack_from(data, offset)
+                name_start = offset + head_size
+                name = data[name_start:data.index(b'\0', name_start)]
+                offset += d_reclen
+                if name not in (b'.', b'..'):
+                    result.append((d_ino, os.fsdecode(name), d_type))
+    finally:
+        os.close(dfd)
+    return result
+
+def _scan_folder(folder_path, recursive=False):
+    """列出文件夹顶层的文件和（recursive时）子文件夹，排除.gitkeep
     
-    if not folder.exists():
-        print(f"文件夹 {folder_name} ({folder_path}) 不存在")
+    Returns:
+        ([(文件名, 路径), ...], [子文件夹名, ...])
+    """
+    files = []
+    subdirs = []
+    
+    dents = _getdents(folder_path)
+    if dents is not None:
+        # Linux快速路径：类型直接取自d_type，仅在文件系统不提供时回退到lstat
+        dents.sort()
+        for _, name, d_type in dents:
+            if name == '.gitkeep':
+                continue
+            path = os.path.join(folder_path, name)
+            if d_type == _DT_UNKNOWN:
+                try:
+                    mode = os.lstat(path).st_mode
+                except FileNotFoundError:
+                    # 读取目录后文件已被删除（如同时运行的另一次清理）
+                    continue
+                d_type = _DT_REG if stat.S_ISREG(mode) else _DT_DIR if stat.S_ISDIR(mode) else -1
+            if d_type == _DT_REG:
+                files.append((name, path))
+            elif recursive and d_type == _DT_DIR and _keep_dir_name(name):
+                subdirs.append(name)
+        return files, subdirs
+    
+    # 通用路径：单次os.scandir遍历；先取首项，空目录无需继续遍历
+    entries = []
+    with os.scandir(folder_path) as it:
+        first = next(it, None)
+        if first is None:
+            return files, subdirs
+        for e in itertools.chain((first,), it):
+            if e.name == '.gitkeep':
+                continue
+            if e.is_file(follow_symlinks=False):
+                entries.append(e)
+            elif recursive and e.is_dir(follow_symlinks=False) and _keep_dir_name(e.name):
+                subdirs.append(e.name)
+    
+    # POSIX下按inode升序删除，减少ext4/XFS/btrfs目录B树的重平衡
+    # （DirEntry.inode() 直接取自dirent，无额外系统调用）
+    if os.name == 'posix':
+        entries.sort(key=os.DirEntry.inode)
+    files = [(e.name, e.path) for e in entries]
+    return files, subdirs
+
+def clear_folder_recursive(root, dir_filter=None):
+    """递归清空文件夹（保留根目录和.gitkeep）
+    
+    使用显式的os.scandir迭代器栈遍历目录树，遇到文件立即删除，
+    子目录在其内容处理完后（后序）删除。与非递归模式一致，只删除普通文件，
+    符号链接等其他类型的条目既不跟随也不删除；dir_filter(entry) 返回False的
+    子目录整体跳过。
+    
+    Returns:
+        (删除的文件数, 删除的目录数, [(路径, 错误), ...])
+    """
+    if dir_filter is None:
+        dir_filter = _default_dir_filter
+    
+    deleted_files = 0
+    deleted_dirs = 0
+    errors = []
+    stack = [(root, os.scandir(root))]
+    try:
+        while stack:
+            path, it = stack[-1]
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if dir_filter(entry):
+                        try:
+                            stack.append((entry.path, os.scandir(entry.path)))
+                        except OSError as e:
+                            errors.append((entry.path, e))
+                            continue
+                        break
+                elif entry.name != '.gitkeep' and entry.is_file(follow_symlinks=False):
+                    try:
+                        os.unlink(entry.path)
+                        deleted_files += 1
+                    except OSError as e:
+                        if e.errno not in _IGNORED_UNLINK_ERRNOS:
+                            errors.append((entry.path, e))
+            else:
+                # 当前目录已遍历完毕，后序删除（根目录保留）
+                it.close()
+                stack.pop()
+                if stack:
+                    try:
+                        os.rmdir(path)
+                        deleted_dirs += 1
+                    except OSError as e:
+                        # 目录中还保留着.gitkeep或被过滤的子目录
+                        if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                            errors.append((path, e))
+    finally:
+        for _, it in stack:
+            it.close()
+    
+    return deleted_files, deleted_dirs, errors
+
+def clear_folder(folder_path, folder_name, threads=DEFAULT_THREADS, recursive=False,
+                 assume_yes=False, sync=False, log=None):
+    """清空指定文件夹内的所有文件（recursive为True时同时清空子文件夹，
+    assume_yes为True时跳过确认提示，sync为True时删除后统一落盘一次，
+    给出log列表时输出信息按行追加到其中而不直接打印）"""
+    if log is None:
+        say, say_lines = print, _write_lines
+    else:
+        say, say_lines = log.append, log.extend
+    
+    # 只解析一次真实路径，并拒绝清空当前工作目录之外的文件夹（如 "../.."）
+    real_path = os.path.realpath(folder_path)
+    cwd = os.path.realpath(os.getcwd())
+    try:
+        inside_cwd = os.path.commonpath([real_path, cwd]) == cwd and real_path != cwd
+    except ValueError:
+        # Windows下位于不同驱动器
+        inside_cwd = False
+    if not inside_cwd:
+        say(f"{folder_name} ({folder_path}) 不在当前工作目录内，已拒绝清空")
         return False
     
-    if not folder.is_dir():
-        print(f"{folder_name} ({folder_path}) 不是有效的文件夹")
+    # 一次stat同时完成存在性和类型检查
+    try:
+        st = os.stat(real_path)
+    except FileNotFoundError:
+        say(f"文件夹 {folder_name} ({folder_path}) 不存在")
         return False
     
-    # 获取文件夹内的所有文件（排除.gitkeep）
-    files = [f for f in folder.iterdir() if f.is_file() and f.name != '.gitkeep']
+    if not stat.S_ISDIR(st.st_mode):
+        say(f"{folder_name} ({folder_path}) 不是有效的文件夹")
+        return False
+    
+    # 获取文件夹内的所有文件（排除.gitkeep），列表同时用于显示、计数和删除
+    files, subdirs = _scan_folder(real_path, recursive)
     
-    if not files:
-        print(f"文件夹 {folder_name} ({folder_path}) 已经是空的（或只包含.gitkeep）")
+    if not files and not subdirs:
+        say(f"文件夹 {folder_name} ({folder_path}) 已经是空的（或只包含.gitkeep）")
         return True
     
-    print(f"文件夹 {folder_name} ({folder_path}) 包含以下文件：")
     file_count = len(files)
-    for file in files:
-        print(f"  - {file.name}")
-    
-    if file_count == 0:
-        print("文件夹内没有需要删除的文件")
-        return True
+    prefix = "  - "
+    lines = [prefix + name for name, _ in files]
+    lines.extend(prefix + name + "/" for name in subdirs)
+    # 递归模式下子文件夹的内容不逐一列出
+    scope = "（仅列出顶层条目）" if recursive else ""
+    if len(lines) > LISTING_LIMIT:
+        # 条目过多时只显示示例，避免大量终端输出拖慢确认
+        say(f"文件夹 {folder_name} ({folder_path}) 包含 {len(lines)} 个条目{scope}，示例：")
+        lines = lines[:LISTING_SAMPLE]
+        lines.append(f"  ... 还有 {file_count + len(subdirs) - LISTING_SAMPLE} 个")
+    else:
+        say(f"文件夹 {folder_name} ({folder_path}) 包含以下文件{scope}：")
+    say_lines(lines)
     
     # 确认删除
-    confirm = input(f"\n确认要删除 {folder_name} 文件夹内的 {file_count} 个文件吗？(y/n): ").strip().lower()
+    if subdirs:
+        target = f"{file_count} 个文件和 {len(subdirs)} 个子文件夹"
+    else:
+        target = f"{file_count} 个文件"
+    if assume_yes:
+        confirm = 'y'
+    else:
+        confirm = input(f"\n确认要删除 {folder_name} 文件夹内的 {target}吗？(y/n): ").strip().lower()
     
     if confirm in ('y', 'yes'):
-        deleted_count = 0
-        for file in files:
-            if file.is_file() and file.name != '.gitkeep':
-                try:
-                    file.unlink()
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"删除文件 {file.name} 时出错: {e}")
+        if recursive:
+            deleted_count, dir_count, errors = clear_folder_recursive(real_path)
+            say_lines([f"删除 {path} 时出错: {error}" for path, error in errors])
+            say(f"已成功删除 {deleted_count} 个文件和 {dir_count} 个子文件夹")
+        elif sys.platform == 'win32' and _shell_delete([path for _, path in files]):
+            # Windows下优先使用Shell API批量删除，失败时回退到逐个删除
+            say(f"已成功删除 {file_count} 个文件")
+        else:
+            errors = _unlink_files(real_path, files, threads)
+            deleted_count = file_count - len(errors)
+            say_lines([f"删除文件 {os.path.basename(path)} 时出错: {error}" for path, error in errors])
+            say(f"已成功删除 {deleted_count} 个文件")
         
-        print(f"已成功删除 {deleted_count} 个文件")
+        if sync:
+            _sync_folder(real_path)
         return True
     else:
-        print("已取消操作")
+        say("已取消操作")
         return False
 
-def main():
+def clear_input_and_output(**opts):
+    """清空input和output两个文件夹
+    
+    两个目录互不相关，无需交互确认时并行清空以重叠元数据延迟；
+    需要确认时依次执行，避免两个提示争用标准输入。
+    """
+    folders = ("input", "output")
+    if opts.get("assume_yes"):
+        # 各文件夹的输出先缓存，完成后按顺序整段打印，两个目录的列表不会交错
+        logs = {name: [f"\n--- 清空{name}文件夹 ---"] for name in folders}
+        with ThreadPoolExecutor(max_workers=len(folders)) as ex:
+            futures = [ex.submit(clear_folder, name, name, log=logs[name], **opts)
+                       for name in folders]
+            results = []
+            for name, future in zip(folders, futures):
+                results.append(future.result())
+                _write_lines(logs[name])
+            return all(results)
+    
+    results = []
+    for name in folders:
+        print(f"\n--- 清空{name}文件夹 ---")
+        results.append(clear_folder(name, name, **opts))
+    return all(results)
+
+# 交互菜单选项 -> (函数, 位置参数)；选项4（退出）在主循环中单独处理
+ACTIONS = {
+    '1': (clear_folder, ("input", "input")),
+    '2': (clear_folder, ("output", "output")),
+    '3': (clear_input_and_output, ()),
+}
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="清空input或output文件夹内的文件")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS,
+                        help=f"并行删除的线程数 (默认 {DEFAULT_THREADS})")
+    parser.add_argument("--recursive", action="store_true",
+                        help="同时清空子文件夹（跳过.git，保留符号链接）")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        default=os.environ.get("CLEAN_YES") == "1",
+                        help="跳过删除确认（也可设置环境变量 CLEAN_YES=1）")
+    parser.add_argument("--sync", action="store_true",
+                        help="删除完成后将文件系统元数据统一落盘一次")
+    parser.add_argument("--folder", choices=("input", "output", "both"),
+                        help="直接清空指定文件夹并退出，不显示交互菜单")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """主函数 - 交互式菜单"""
+    args = parse_args(argv)
+    opts = dict(threads=args.threads, recursive=args.recursive, assume_yes=args.yes,
+                sync=args.sync)
+    
+    # 非交互模式，适合脚本/批处理调用
+    if args.folder == "both":
+        clear_input_and_output(**opts)
+        return
+    if args.folder:
+        clear_folder(args.folder, args.folder, **opts)
+        return
+    
     print("=== 文件夹清理工具 ===")
     print("用于清空input或output文件夹内的文件")
     print()
@@ -72,15 +483,10 @@ def main():
             
             choice = input("\n请输入选项 (1-4): ").strip()
             
-            if choice == '1':
-                clear_folder("input", "input")
-            elif choice == '2':
-                clear_folder("output", "output")
-            elif choice == '3':
-                print("\n--- 清空input文件夹 ---")
-                clear_folder("input", "input")
-                print("\n--- 清空output文件夹 ---")
-                clear_folder("output", "output")
+            action = ACTIONS.get(choice)
+            if action:
+                func, func_args = action
+                func(*func_args, **opts)
             elif choice == '4':
                 print("感谢使用，再见！")
                 break
@@ -9,23 +9,649 @@ __version__ = "2.2.1"
 
 import sys
 import os
+import itertools
+import shutil
+import sqlite3
+import struct
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QLabel, QFileDialog, 
                              QSpinBox, QProgressBar, QTextEdit, QMessageBox,
-                             QGroupBox, QGridLayout, QListWidget, QListWidgetItem, 
+                             QGroupBox, QGridLayout, QListView, QListWidget, QListWidgetItem, 
                              QAbstractItemView, QSplitter, QSizePolicy, QProgressDialog)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QDir, QSize
-from PyQt5.QtGui import QPixmap, QDragEnterEvent, QDropEvent, QFont, QIcon
-from PIL import Image
+from PyQt5.QtCore import (Qt, QThread, pyqtSignal, QDir, QSize, QObject, QTimer, QEvent, QPoint,
+                          QRunnable, QThreadPool)
+from PyQt5.QtGui import (QPixmap, QPixmapCache, QImage, QImageReader, QImageIOHandler,
+                         QDragEnterEvent, QDropEvent, QFont, QIcon)
+import PIL
+from PIL import Image, features
+
+# 解码缩放和尺寸计算与命令行版本共用同一份实现
+from image_stitcher import load_and_resize, scale_to_min_width
+
+try:
+    # 可选依赖：安装了libvips时使用其SIMD缩放和流式拼接
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+
+# 停止处理时等待线程自行退出的最长时间（毫秒），超时后强制终止
+STOP_TIMEOUT_MS = 5000
+
+# 清空输出目录时并发删除的线程数
+CLEAR_OUTPUT_THREADS = 8
+
+# 默认输出JPEG质量（界面中可调整）：长图多为照片拼接，90与95肉眼难以区分，
+# 但编码更快、文件更小
+OUTPUT_QUALITY = 90
+# Pillow保存长图的JPEG参数（质量另行指定）：不做Huffman表优化、非渐进式、
+# 4:2:0色度抽样（色度数据最少，编码工作量也最小）
+JPEG_SAVE_OPTIONS = dict(optimize=False, progressive=False, subsampling=2)
+
+def open_in_file_manager(path):
+    """在系统文件管理器中打开目录，以独立进程启动，不等待文件管理器就绪"""
+    try:
+        if sys.platform == 'win32':
+            subprocess.Popen(['explorer', os.path.normpath(path)],
+                             creationflags=subprocess.DETACHED_PROCESS)
+        elif sys.platform == 'darwin':
+            subprocess.Popen(['open', path], start_new_session=True)
+        else:
+            subprocess.Popen(['xdg-open', path], start_new_session=True,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError as e:
+        print(f"无法打开目录 {path}: {e}")
+
+def describe_backend():
+    """返回当前使用的拼接/编码后端说明，便于确认是否启用了加速库"""
+    if pyvips is not None:
+        return f"使用libvips {pyvips.version(0)}.{pyvips.version(1)} 处理图片"
+    # Pillow-SIMD的版本号带有.postN后缀，缩放使用AVX2/SSE4指令实现
+    pillow = "Pillow-SIMD" if '.post' in PIL.__version__ else "Pillow"
+    if features.check_feature('libjpeg_turbo'):
+        return f"使用{pillow}处理图片，JPEG编解码: libjpeg-turbo {features.version_feature('libjpeg_turbo')}"
+    return f"使用{pillow}处理图片，JPEG编解码: libjpeg（未启用libjpeg-turbo，编码较慢）"
+
+# 携带图片尺寸的JPEG SOF标记（不含DHT 0xC4、JPG 0xC8、DAC 0xCC）
+_JPEG_SOF_MARKERS = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+                               0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+
+def probe_image_size(img_path):
+    """直接从JPEG的SOF段或PNG的IHDR块读取尺寸 (宽, 高)
+    
+    只读取文件开头的少量字节，不经过Pillow的插件识别和标记解析；
+    其他格式或无法识别时返回None。
+    """
+    with open(img_path, 'rb') as f:
+        head = f.read(24)
+        if head[:8] == b'\x89PNG\r\n\x1a\n':
+            if len(head) < 24 or head[12:16] != b'IHDR':
+                return None
+            return struct.unpack('>II', head[16:24])
+        if head[:2] != b'\xff\xd8':
+            return None
+        f.seek(2)
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            if marker[1] == 0xFF:
+                # 标记前的填充字节
+                f.seek(-1, 1)
+                continue
+            if marker[1] == 0x01 or 0xD0 <= marker[1] <= 0xD7:
+                continue  # 不带长度字段的独立标记
+            segment = f.read(7)
+            if len(segment) < 7:
+                return None
+            if marker[1] in _JPEG_SOF_MARKERS:
+                height, width = struct.unpack('>HH', segment[3:7])
+                return (width, height) if width and height else None
+            length = struct.unpack('>H', segment[:2])[0]
+            if length < 2:
+                return None
+            f.seek(length - 7, 1)
+
+def read_image_size(img_path):
+    """读取图片尺寸 (宽, 高)，不解码像素；读取失败时抛出异常"""
+    size = probe_image_size(img_path)
+    if size is not None:
+        return size
+    with Image.open(img_path) as img:
+        return img.size
+
+def make_thumbnail_image(image_path, size):
+    """生成缩略图QImage，失败时返回None
+    
+    优先通过Pillow加载：JPEG使用draft模式，libjpeg在IDCT阶段直接按1/2~1/8
+    比例解码，无需先解码出整张大图再缩小；其他格式由thumbnail()先做整数倍
+    reduce再缩放。Pillow无法打开的格式再使用QImageReader加载。
+    """
+    try:
+        with Image.open(image_path) as img:
+            img.draft('RGB', (size * 2, size * 2))
+            img.thumbnail((size, size), Image.Resampling.BILINEAR)
+            # 带透明通道的图片保留alpha，与Qt加载的结果一致
+            if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+                img = img.convert('RGBA')
+                fmt, channels = QImage.Format_RGBA8888, 4
+            else:
+                img = img.convert('RGB')
+                fmt, channels = QImage.Format_RGB888, 3
+            data = img.tobytes()
+            return QImage(data, img.width, img.height, img.width * channels, fmt).copy()
+    except Exception:
+        pass
+    
+    try:
+        # 解码器支持时（如Qt的JPEG插件）直接按缩小后的尺寸解码，
+        # 并且全程使用QImage，不创建整幅大图的QPixmap
+        reader = QImageReader(image_path)
+        source_size = reader.size()
+        if source_size.isValid() and reader.supportsOption(QImageIOHandler.ScaledSize):
+            reader.setScaledSize(source_size.scaled(size, size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if not image.isNull():
+            # 大图先用最近邻快速缩小到目标尺寸的4倍，再平滑缩放到目标尺寸，
+            # 平滑缩放只需处理很少的像素，效果与直接平滑缩放几乎相同
+            if max(image.width(), image.height()) > size * 4:
+                image = image.scaled(size * 4, size * 4, Qt.KeepAspectRatio, Qt.FastTransformation)
+            # 解码器已直接输出目标尺寸时无需再缩放一次
+            if max(image.width(), image.height()) == size:
+                return image
+            return image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    except Exception:
+        pass
+    return None
+
+def make_thumbnail_icon(image_path, size):
+    """生成缩略图图标，失败时返回None"""
+    image = make_thumbnail_image(image_path, size)
+    if image is None:
+        return None
+    return QIcon(QPixmap.fromImage(image))
+
+# 长循环中每处理这么多项才刷新一次进度并处理事件
+PROGRESS_BATCH = 64
+
+def scan_image_stats(image_paths):
+    """批量获取图片的 (大小, 修改时间)，返回 {路径: (大小, 修改时间)}
+    
+    按所在目录分组，每个目录只执行一次os.scandir，通过目录项读取stat信息
+    （Windows下直接取自目录读取结果，无需逐个文件的系统调用）。
+    读取失败的图片不会出现在结果中。
+    """
+    by_dir = {}
+    for path in image_paths:
+        by_dir.setdefault(os.path.dirname(path), {})[os.path.basename(path)] = path
+    
+    stats = {}
+    for directory, names in by_dir.items():
+        try:
+            with os.scandir(directory or '.') as it:
+                for entry in it:
+                    path = names.get(entry.name)
+                    if path is None:
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    stats[path] = (st.st_size, st.st_mtime)
+        except OSError:
+            continue
+    return stats
+
+def reorder_list_items(list_widget, rows):
+    """按给定的原行号顺序就地重排QListWidget中的项
+    
+    通过takeItem取出全部现有项再按新顺序addItem，图标等数据随项保留，
+    不会重新读取或解码图片。
+    """
+    list_widget.setUpdatesEnabled(False)
+    try:
+        items = [list_widget.takeItem(0) for _ in range(list_widget.count())]
+        for row in rows:
+            list_widget.addItem(items[row])
+    finally:
+        list_widget.setUpdatesEnabled(True)
+
+class ImageSortTask(QObject):
+    """分批收集列表中图片的信息并排序，完成后就地重排列表项
+    
+    每处理PROGRESS_BATCH项就通过QTimer让出一次事件循环，
+    界面和进度条保持响应，不需要在循环中调用processEvents。
+    finished信号参数为 (是否成功, 错误信息)，用户取消时为 (False, "")。
+    """
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, list_widget, sort_by, progress):
+        super().__init__(list_widget)
+        self.list_widget = list_widget
+        self.sort_by = sort_by
+        self.progress = progress
+        self.paths = [list_widget.item(i).data(Qt.UserRole) for i in range(list_widget.count())]
+        self.names = list(map(os.path.basename, self.paths))
+        self.stats = None
+        self.image_info = []
+        self.sorted_paths = []
+    
+    def start(self):
+        self.progress.setMaximum(len(self.paths))
+        QTimer.singleShot(0, self.step)
+    
+    def step(self):
+        """处理一批图片，未处理完则安排下一批"""
+        if self.progress.wasCanceled():
+            self.progress.close()
+            self.finished.emit(False, "")
+            return
+        
+        try:
+            if self.stats is None:
+                # 第一步：按目录批量读取stat
+                self.stats = scan_image_stats(self.paths)
+            else:
+                start = len(self.image_info)
+                end = min(start + PROGRESS_BATCH, len(self.paths))
+                for row in range(start, end):
+                    img_path = self.paths[row]
+                    size, mtime = self.stats.get(img_path, (0, 0))
+                    self.image_info.append({
+                        'row': row,
+                        'path': img_path,
+                        'name': self.names[row],
+                        'size': size,
+                        'mtime': mtime
+                    })
+                self.progress.setValue(end)
+            
+            if self.stats is None or len(self.image_info) < len(self.paths):
+                QTimer.singleShot(0, self.step)
+                return
+            
+            self.finish()
+        except Exception as e:
+            self.progress.close()
+            self.finished.emit(False, str(e))
+    
+    def finish(self):
+        """排序并就地重排列表项"""
+        image_info = self.image_info
+        if self.sort_by == 'name':
+            image_info.sort(key=lambda x: x['name'].lower())
+        elif self.sort_by == 'size':
+            image_info.sort(key=lambda x: x['size'], reverse=True)
+        elif self.sort_by == 'time':
+            image_info.sort(key=lambda x: x['mtime'], reverse=True)
+        
+        # 排序期间列表被修改过时放弃重排，避免按过期的行号移动列表项
+        if self.list_widget.count() != len(self.paths):
+            self.progress.close()
+            self.finished.emit(False, "排序期间图片列表发生了变化")
+            return
+        
+        # 就地重排现有列表项（保留缩略图，无需重新解码）
+        reorder_list_items(self.list_widget, [info['row'] for info in image_info])
+        self.sorted_paths = [info['path'] for info in image_info]
+        self.progress.close()
+        self.finished.emit(True, "")
+
+# 缩略图磁盘缓存（sqlite数据库），再次打开同一文件夹时直接读取小图，无需解码原图。
+# 按XDG规范放在 $XDG_CACHE_HOME 下，未设置时使用 ~/.cache
+THUMBNAIL_CACHE_DB = (Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+                      / 'momentstitcher' / 'thumbs.sqlite')
+# 缓存格式版本，记录在数据库的user_version中；只有保存的像素格式改变时才需要递增，
+# 旧版本的缓存会在打开时清除
+THUMBNAIL_CACHE_VERSION = 1
+# 命中缓存时，距上次记录的使用时间超过该秒数才更新last_used，
+# 避免每显示一张缩略图都产生一次写事务
+THUMBNAIL_TOUCH_INTERVAL = 24 * 3600
+# 磁盘缓存上限，超出后按最近使用时间淘汰最旧的四分之一
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_thread_local = threading.local()
+
+def _thumbnail_db():
+    """获取当前线程的缓存数据库连接（sqlite连接不能跨线程共享），无法使用时返回None
+    
+    数据库暂时被其他连接锁住时不记录失败，下次调用会重新尝试打开。
+    """
+    db = getattr(_thread_local, 'db', None)
+    if db is None:
+        try:
+            THUMBNAIL_CACHE_DB.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(THUMBNAIL_CACHE_DB), timeout=5)
+        except (OSError, sqlite3.Error):
+            _thread_local.db = False
+            return None
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            # WAL模式下NORMAL只在检查点时同步，提交时不再等待fsync
+            db.execute("PRAGMA synchronous=NORMAL")
+            # 缩略图以未压缩的RGBA8888像素保存，读取时直接包装为QImage，无需PNG编解码。
+            # 只在格式版本变化时重建表（旧版本保存PNG的thumbs表一并删除），
+            # 其他进程或线程新建连接时保留已有缓存。检查和建表在同一个写事务中完成，
+            # 多个线程同时首次打开时不会删除彼此刚建好的表
+            db.execute("BEGIN IMMEDIATE")
+            if db.execute("PRAGMA user_version").fetchone()[0] != THUMBNAIL_CACHE_VERSION:
+                db.execute("DROP TABLE IF EXISTS thumbs")
+                db.execute("DROP TABLE IF EXISTS thumbnails")
+                db.execute(f"PRAGMA user_version = {THUMBNAIL_CACHE_VERSION}")
+            db.execute("CREATE TABLE IF NOT EXISTS thumbnails ("
+                       "path TEXT, size INTEGER, mtime REAL, width INTEGER, height INTEGER, "
+                       "pixels BLOB, last_used REAL, PRIMARY KEY (path, size))")
+            db.execute("CREATE INDEX IF NOT EXISTS thumbnails_last_used ON thumbnails (last_used)")
+            db.commit()
+        except sqlite3.Error as e:
+            db.close()
+            if isinstance(e, sqlite3.OperationalError) and 'locked' in str(e):
+                return None
+            db = False
+        _thread_local.db = db
+    return db or None
+
+def _evict_thumbnail_cache(db):
+    """缓存数据超出上限时删除最久未使用的四分之一"""
+    page_count = db.execute("PRAGMA page_count").fetchone()[0]
+    free_count = db.execute("PRAGMA freelist_count").fetchone()[0]
+    page_size = db.execute("PRAGMA page_size").fetchone()[0]
+    if (page_count - free_count) * page_size > THUMBNAIL_CACHE_MAX_BYTES:
+        db.execute("DELETE FROM thumbnails WHERE rowid IN (SELECT rowid FROM thumbnails "
+                   "ORDER BY last_used LIMIT (SELECT COUNT(*) / 4 FROM thumbnails))")
+
+def load_thumbnail_image(image_path, mtime, size, other_sizes=()):
+    """读取缩略图QImage，失败时返回None（只使用QImage，可在工作线程中调用）
+    
+    先查磁盘缓存，修改时间一致才使用；未命中才解码原图并写入磁盘缓存。
+    解码时按size和other_sizes中最大的尺寸只解码一次，其余尺寸由解码结果
+    缩小得到并一并写入缓存，同一图片在其他列表中显示时无需再解码原图。
+    """
+    path = os.path.abspath(image_path)
+    db = _thumbnail_db()
+    if db is not None:
+        try:
+            row = db.execute("SELECT mtime, width, height, pixels, last_used FROM thumbnails "
+                             "WHERE path = ? AND size = ?", (path, size)).fetchone()
+            if row is not None and row[0] == mtime:
+                _, width, height, pixels, last_used = row
+                if len(pixels) == width * height * 4:
+                    now = time.time()
+                    if now - last_used > THUMBNAIL_TOUCH_INTERVAL:
+                        db.execute("UPDATE thumbnails SET last_used = ? WHERE path = ? AND size = ?",
+                                   (now, path, size))
+                        db.commit()
+                    # copy()让QImage持有自己的像素数据，不依赖pixels的生命周期
+                    return QImage(pixels, width, height, width * 4, QImage.Format_RGBA8888).copy()
+        except sqlite3.Error:
+            pass
+    
+    sizes = {size, *other_sizes}
+    decoded = make_thumbnail_image(image_path, max(sizes))
+    if decoded is None:
+        return None
+    
+    images = {}
+    for thumb_size in sizes:
+        if max(decoded.width(), decoded.height()) <= thumb_size:
+            images[thumb_size] = decoded
+        else:
+            images[thumb_size] = decoded.scaled(thumb_size, thumb_size, Qt.KeepAspectRatio,
+                                                Qt.SmoothTransformation)
+    
+    if db is not None:
+        try:
+            now = time.time()
+            for thumb_size, image in images.items():
+                image = images[thumb_size] = image.convertToFormat(QImage.Format_RGBA8888)
+                # RGBA8888每行字节数正好是宽度的4倍，没有行尾填充
+                pixels = image.constBits().asstring(image.width() * image.height() * 4)
+                db.execute("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           (path, thumb_size, mtime, image.width(), image.height(), pixels, now))
+            _evict_thumbnail_cache(db)
+            db.commit()
+        except sqlite3.Error:
+            pass
+    return images[size]
+
+# 缩略图内存缓存使用QPixmapCache，按占用字节数限制容量（单位KB），
+# 超出时由Qt自动淘汰最久未使用的缩略图；只在GUI线程访问
+THUMBNAIL_MEMORY_LIMIT_KB = 128 * 1024
+# 生成失败的缩略图 (路径, 修改时间, 尺寸)，避免反复解码
+_failed_thumbnails = set()
+
+def _pixmap_cache_key(key):
+    image_path, mtime, size = key
+    return f"{image_path}|{mtime}@{size}"
+
+# 最近使用的QIcon对象，同一图片出现在多个列表项中时共用同一个图标
+INTERNED_ICON_COUNT = 512
+_interned_icons = OrderedDict()
+
+def get_cached_icon(key):
+    """查询内存缓存，返回 (是否命中, 图标)，生成失败的缩略图返回 (True, None)"""
+    if key in _failed_thumbnails:
+        return True, None
+    icon = _interned_icons.get(key)
+    if icon is not None:
+        _interned_icons.move_to_end(key)
+        return True, icon
+    
+    pixmap = QPixmapCache.find(_pixmap_cache_key(key))
+    if pixmap is None or pixmap.isNull():
+        return False, None
+    icon = _interned_icons[key] = QIcon(pixmap)
+    if len(_interned_icons) > INTERNED_ICON_COUNT:
+        _interned_icons.popitem(last=False)
+    return True, icon
+
+def put_cached_icon(key, pixmap):
+    """写入内存缓存，pixmap为None表示生成失败"""
+    if pixmap is None:
+        _failed_thumbnails.add(key)
+    else:
+        QPixmapCache.insert(_pixmap_cache_key(key), pixmap)
+
+class ThumbnailJob(QRunnable):
+    """在QThreadPool中生成缩略图，完成后通过信号把QImage发回GUI线程"""
+    
+    def __init__(self, key, other_sizes, signal):
+        super().__init__()
+        self.key = key
+        self.other_sizes = other_sizes
+        self.signal = signal
+    
+    def run(self):
+        image_path, mtime, size = self.key
+        try:
+            image = load_thumbnail_image(image_path, mtime, size, self.other_sizes)
+        except Exception:
+            image = None
+        try:
+            self.signal.emit(self.key, image)
+        except RuntimeError:
+            # 列表已被销毁，结果直接丢弃
+            pass
+
+def clear_directory(directory):
+    """删除目录中除.gitkeep外的所有内容
+    
+    Returns:
+        (成功删除的项目数, 删除失败的异常列表)
+    """
+    # scandir的目录项自带类型信息，无需再对每一项单独stat
+    targets = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name == '.gitkeep':
+                continue  # 跳过.gitkeep文件
+            
+            # 指向目录的符号链接只删除链接本身
+            if entry.is_dir(follow_symlinks=False):
+                targets.append((shutil.rmtree, entry.path))
+            else:
+                targets.append((os.unlink, entry.path))
+    
+    # 删除以文件元数据操作为主，多线程并发可以重叠各项的I/O等待
+    with ThreadPoolExecutor(max_workers=CLEAR_OUTPUT_THREADS) as executor:
+        futures = [executor.submit(remove, path) for remove, path in targets]
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    return len(futures) - len(errors), errors
+
+class ClearDirectoryJob(QRunnable):
+    """在QThreadPool中清空目录，完成后通过信号把结果发回GUI线程"""
+    
+    def __init__(self, directory, signal):
+        super().__init__()
+        self.directory = directory
+        self.signal = signal
+    
+    def run(self):
+        try:
+            deleted_count, errors = clear_directory(self.directory)
+            failure = None
+        except Exception as e:
+            deleted_count, errors, failure = 0, [], e
+        try:
+            self.signal.emit(deleted_count, errors, failure)
+        except RuntimeError:
+            # 主窗口已被销毁，结果直接丢弃
+            pass
+
+# 占位图标按尺寸只创建一次（QPixmap必须在QApplication创建之后才能构造，因此延迟创建）
+_placeholder_icons = {}
+
+def placeholder_icon(size):
+    """获取指定尺寸的浅灰色占位图标"""
+    icon = _placeholder_icons.get(size)
+    if icon is None:
+        pixmap = QPixmap(size, size)
+        pixmap.fill(Qt.lightGray)
+        icon = _placeholder_icons[size] = QIcon(pixmap)
+    return icon
+
+# 未分组池和分组列表中的缩略图尺寸（逻辑像素）
+POOL_THUMBNAIL_SIZE = 60
+GROUP_THUMBNAIL_SIZE = 50
+
+# 列表项数据角色：缩略图是否已经生成（失败也记为已生成，避免反复重试）
+THUMBNAIL_LOADED_ROLE = Qt.UserRole + 1
+
+class ThumbnailLoader(QObject):
+    """按需为QListWidget生成缩略图
+    
+    添加列表项时不再立即解码图片，而是在事件循环空闲时只为视口中可见、
+    尚未生成缩略图的项生成图标；滚动、缩放或列表内容变化时重新检查。
+    解码在QThreadPool中进行，不会阻塞界面。
+    """
+    
+    thumbnail_ready = pyqtSignal(object, object)
+    
+    def __init__(self, list_widget, size):
+        super().__init__(list_widget)
+        self.list_widget = list_widget
+        self.size = size
+        self.pending = set()
+        self.thumbnail_ready.connect(self.on_thumbnail_ready)
+        
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.load_visible)
+        
+        list_widget.verticalScrollBar().valueChanged.connect(self.schedule)
+        model = list_widget.model()
+        model.rowsInserted.connect(self.on_rows_inserted)
+        model.rowsMoved.connect(self.schedule)
+        model.layoutChanged.connect(self.schedule)
+        list_widget.viewport().installEventFilter(self)
+    
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Show, QEvent.Resize):
+            self.schedule()
+        return False
+    
+    def on_rows_inserted(self, parent, first, last):
+        """新加入的项先显示占位图标，真实缩略图稍后按需生成"""
+        icon = placeholder_icon(self.size)
+        for row in range(first, last + 1):
+            item = self.list_widget.item(row)
+            if item is not None and item.icon().isNull():
+                item.setIcon(icon)
+        self.schedule()
+    
+    def schedule(self, *args):
+        """合并短时间内的多次请求，在下一次事件循环空闲时统一处理"""
+        self.timer.start()
+    
+    def load_visible(self):
+        """为视口中可见的项生成缩略图"""
+        list_widget = self.list_widget
+        if not list_widget.isVisible():
+            return
+        viewport_rect = list_widget.viewport().rect()
+        first = list_widget.indexAt(QPoint(1, 1)).row()
+        # 按设备像素比确定缩略图的物理像素尺寸：高分屏上显示清晰，
+        # 普通屏幕也不会多解码；不同尺寸在缓存中分开保存
+        dpr = list_widget.devicePixelRatioF()
+        pixel_size = round(self.size * dpr)
+        # 图片通常会在未分组池和分组之间移动，解码时顺便生成另一种尺寸
+        other_sizes = tuple(round(size * dpr) for size in (POOL_THUMBNAIL_SIZE, GROUP_THUMBNAIL_SIZE))
+        
+        for row in range(max(first, 0), list_widget.count()):
+            item = list_widget.item(row)
+            rect = list_widget.visualItemRect(item)
+            # 项按顺序布局：之后的项要么在视口下方，要么（Batched布局下）尚未布局、
+            # 矩形为空，都不必继续遍历
+            if not rect.isValid() or rect.top() > viewport_rect.bottom():
+                break
+            if item.data(THUMBNAIL_LOADED_ROLE) or not rect.intersects(viewport_rect):
+                continue
+            
+            image_path = item.data(Qt.UserRole)
+            try:
+                key = (image_path, os.path.getmtime(image_path), pixel_size)
+            except OSError:
+                item.setData(THUMBNAIL_LOADED_ROLE, True)
+                continue
+            
+            found, icon = get_cached_icon(key)
+            if found:
+                item.setData(THUMBNAIL_LOADED_ROLE, True)
+                if icon is not None:
+                    item.setIcon(icon)
+            elif key not in self.pending:
+                # 解码交给线程池，完成后再次检查可见项并从内存缓存取图标
+                self.pending.add(key)
+                QThreadPool.globalInstance().start(ThumbnailJob(key, other_sizes, self.thumbnail_ready))
+    
+    def on_thumbnail_ready(self, key, image):
+        """在GUI线程中把工作线程生成的QImage转换为图标（QPixmap只能在GUI线程创建）"""
+        self.pending.discard(key)
+        pixmap = None
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(key[2] / self.size)
+        put_cached_icon(key, pixmap)
+        self.schedule()
 
 class GroupWidget(QWidget):
     """分组组件，支持拖拽"""
+    # 分组在空与非空之间切换时发出 (分组, 是否非空)
+    non_empty_changed = pyqtSignal(object, bool)
     
     def __init__(self, group_name, parent=None):
         super().__init__(parent)
         self.group_name = group_name
         self.images = []
+        self._images_dirty = False
+        self._non_empty = False
+        self._sort_task = None
         self.init_ui()
         self.setAcceptDrops(True)
     
@@ -64,13 +690,22 @@ class GroupWidget(QWidget):
         
         # 图片列表 - 设置为可伸缩
         self.image_list = QListWidget()
-        self.image_list.setIconSize(QSize(50, 50))
+        self.image_list.setIconSize(QSize(GROUP_THUMBNAIL_SIZE, GROUP_THUMBNAIL_SIZE))
         self.image_list.setStyleSheet("QListWidget::item { height: 60px; }")
         self.image_list.setDragEnabled(True)
         self.image_list.setAcceptDrops(True)
         self.image_list.setDefaultDropAction(Qt.MoveAction)
         self.image_list.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.image_list.setUniformItemSizes(True)
         layout.addWidget(self.image_list)
+        self.thumbnail_loader = ThumbnailLoader(self.image_list, GROUP_THUMBNAIL_SIZE)
+        
+        # 列表内容发生任何变化（添加、删除、拖拽移动、清空）时标记图片缓存失效
+        model = self.image_list.model()
+        model.rowsInserted.connect(self._mark_images_dirty)
+        model.rowsRemoved.connect(self._mark_images_dirty)
+        model.rowsMoved.connect(self._mark_images_dirty)
+        model.modelReset.connect(self._mark_images_dirty)
         
         # 删除按钮
         self.remove_btn = QPushButton("清空分组")
@@ -84,36 +719,55 @@ class GroupWidget(QWidget):
         item.setText(os.path.basename(image_path))
         item.setData(Qt.UserRole, image_path)
         
-        # 添加缩略图
-        try:
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                scaled = pixmap.scaled(50, 50, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                item.setIcon(QIcon(scaled))
-        except Exception:
-            pass
-            
         self.image_list.addItem(item)
-        self.images.append(image_path)
+    
+    def add_images(self, image_paths):
+        """批量添加图片到分组：addItems一次插入所有行，只触发一次行插入信号"""
+        image_list = self.image_list
+        start = image_list.count()
+        image_list.addItems([os.path.basename(path) for path in image_paths])
+        for row, image_path in enumerate(image_paths, start):
+            image_list.item(row).setData(Qt.UserRole, image_path)
+    
+    def add_item(self, item):
+        """添加已有的列表项到分组（保留其已生成的缩略图）"""
+        self.image_list.addItem(item)
+    
+    def take_items(self):
+        """按顺序取出分组中的全部列表项，供重新分组时复用"""
+        image_list = self.image_list
+        # 从末尾开始取出，避免每次移除都要移动后面的所有行
+        items = [image_list.takeItem(row) for row in range(image_list.count() - 1, -1, -1)]
+        items.reverse()
+        return items
     
     def clear_group(self):
         """清空分组"""
         self.image_list.clear()
-        self.images.clear()
-        # 更新主窗口的总图片数量显示
-        if hasattr(self.window(), 'update_total_images'):
-            self.window().update_total_images()
+        self.images = []
+        self._images_dirty = False
+    
+    def _mark_images_dirty(self, *args):
+        self._images_dirty = True
+        non_empty = self.image_list.count() > 0
+        if non_empty != self._non_empty:
+            self._non_empty = non_empty
+            self.non_empty_changed.emit(self, non_empty)
     
     def get_images(self):
-        """获取分组中的图片"""
-        # 确保返回当前实际的图片列表
-        current_images = []
-        for i in range(self.image_list.count()):
-            item = self.image_list.item(i)
-            if item:
-                current_images.append(item.data(Qt.UserRole))
-        self.images = current_images  # 同步缓存
-        return current_images
+        """获取分组中的图片（返回的列表不要修改）
+        
+        只有列表内容变化后才重新遍历列表项，否则直接返回缓存。
+        """
+        if self._images_dirty:
+            current_images = []
+            for i in range(self.image_list.count()):
+                item = self.image_list.item(i)
+                if item:
+                    current_images.append(item.data(Qt.UserRole))
+            self.images = current_images  # 同步缓存
+            self._images_dirty = False
+        return self.images
     
     def sort_images(self, sort_by='name'):
         """组内排序功能（带进度条）
@@ -121,7 +775,7 @@ class GroupWidget(QWidget):
         Args:
             sort_by: 排序方式 'name', 'size', 'time'
         """
-        if not self.images:
+        if not self.get_images():
             return
             
         # 创建进度对话框
@@ -132,78 +786,23 @@ class GroupWidget(QWidget):
         progress.setValue(0)
         progress.show()
         
-        try:
-            # 获取当前实际在列表中的图片
-            current_images = []
-            for i in range(self.image_list.count()):
-                item = self.image_list.item(i)
-                if item:
-                    current_images.append(item.data(Qt.UserRole))
-            
-            if not current_images:
-                progress.close()
-                return
-                
-            total_images = len(current_images)
-            progress.setMaximum(total_images)
-            
-            # 获取图片信息列表
-            image_info = []
-            for idx, img_path in enumerate(current_images):
-                if progress.wasCanceled():
-                    progress.close()
-                    return
-                    
-                try:
-                    stat = os.stat(img_path)
-                    info = {
-                        'path': img_path,
-                        'name': os.path.basename(img_path),
-                        'size': stat.st_size,
-                        'mtime': stat.st_mtime
-                    }
-                    image_info.append(info)
-                except (OSError, IOError):
-                    image_info.append({
-                        'path': img_path,
-                        'name': os.path.basename(img_path),
-                        'size': 0,
-                        'mtime': 0
-                    })
-                
-                progress.setValue(idx + 1)
-                QApplication.processEvents()
-            
-            # 根据排序方式进行排序
-            if sort_by == 'name':
-                image_info.sort(key=lambda x: x['name'].lower())
-            elif sort_by == 'size':
-                image_info.sort(key=lambda x: x['size'], reverse=True)
-            elif sort_by == 'time':
-                image_info.sort(key=lambda x: x['mtime'], reverse=True)
-            
-            # 清空当前列表并重新添加排序后的图片
-            self.image_list.clear()
-            self.images.clear()
-            
-            for idx, info in enumerate(image_info):
-                if progress.wasCanceled():
-                    progress.close()
-                    return
-                    
-                self.add_image(info['path'])
-                progress.setValue(idx + 1)
-                QApplication.processEvents()
-                
-            progress.close()
-            
-            # 通知主窗口更新
-            if hasattr(self.window(), 'update_total_images'):
-                self.window().update_total_images()
-                
-        except Exception as e:
-            progress.close()
-            print(f"排序失败: {e}")
+        self._sort_task = ImageSortTask(self.image_list, sort_by, progress)
+        self._sort_task.finished.connect(self.on_sort_finished)
+        self._sort_task.start()
+    
+    def on_sort_finished(self, success, error):
+        """组内排序完成"""
+        task = self._sort_task
+        self._sort_task = None
+        task.deleteLater()
+        
+        if error:
+            print(f"排序失败: {error}")
+        if not success:
+            return
+        
+        self.images = task.sorted_paths
+        self._images_dirty = False
     
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls() or event.mimeData().hasText():
@@ -218,10 +817,11 @@ class GroupWidget(QWidget):
             image_path = event.mimeData().text()
             if os.path.exists(image_path):
                 self.add_image(image_path)
+        # 主窗口的输出数量通过non_empty_changed信号更新，这里无需再通知
         event.acceptProposedAction()
-        # 通知主窗口更新总图片数量
-        if hasattr(self.window(), 'update_total_images'):
-            self.window().update_total_images()
+
+class StitchCancelled(Exception):
+    """用户取消了拼图操作"""
 
 class ImageStitcherThread(QThread):
     """后台处理线程"""
@@ -229,15 +829,32 @@ class ImageStitcherThread(QThread):
     log_message = pyqtSignal(str)
     finished_signal = pyqtSignal(bool, str)
     
-    def __init__(self, output_dir, image_groups):
+    def __init__(self, output_dir, image_groups, quality=OUTPUT_QUALITY):
         super().__init__()
         self.output_dir = Path(output_dir)
         self.image_groups = image_groups  # 现在是分组后的图片列表
+        self.quality = quality
+        self._cancel = threading.Event()
+    
+    def request_cancel(self):
+        """请求停止处理，线程会在处理完当前图片后自行退出"""
+        self._cancel.set()
+    
+    def check_cancelled(self):
+        """已请求停止时抛出StitchCancelled"""
+        if self._cancel.is_set():
+            raise StitchCancelled()
         
     def run(self):
         """后台执行拼图操作（带详细进度）"""
+        executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+        # JPEG编码放在单独的线程中，与下一组的解码和缩放重叠进行
+        save_executor = ThreadPoolExecutor(max_workers=1)
+        pending_save = None
+        self._last_progress = -1
         try:
             self.log_message.emit("开始处理图片...")
+            self.log_message.emit(describe_backend())
             self.output_dir.mkdir(exist_ok=True)
             
             total_groups = len(self.image_groups)
@@ -249,96 +866,284 @@ class ImageStitcherThread(QThread):
             total_steps = 0
             for group_images in self.image_groups:
                 if len(group_images) >= 2:
-                    total_steps += len(group_images) + 3  # 加载+缩放+创建+保存
+                    total_steps += 2 * len(group_images) + 2  # 读取尺寸+缩放+创建+保存
             
             current_step = 0
+            submitted = {}  # 组号 -> 已提前提交的解码任务
             
             for group_num, group_images in enumerate(self.image_groups):
+                self.check_cancelled()
                 if len(group_images) < 2:
                     self.log_message.emit(f"第{group_num+1}组图片数量不足，跳过")
                     continue
                 
                 self.log_message.emit(f"开始处理第{group_num+1}组图片（共{len(group_images)}张）...")
                 
-                # 加载并处理图片
-                pil_images = []
-                min_width = float('inf')
+                if total_groups == 1:
+                    output_name = "stitched_long_image.jpg"
+                else:
+                    output_name = f"stitched_long_image_part{group_num + 1}.jpg"
+                output_path = self.output_dir / output_name
                 
-                for idx, img_path in enumerate(group_images):
-                    try:
-                        self.log_message.emit(f"  加载图片: {Path(img_path).name}")
-                        img = Image.open(img_path)
-                        if img.mode in ('RGBA', 'LA'):
-                            background = Image.new('RGB', img.size, (255, 255, 255))
-                            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                            img = background
-                        elif img.mode != 'RGB':
-                            img = img.convert('RGB')
-                        
-                        pil_images.append((img, img_path))
-                        min_width = min(min_width, img.width)
-                        
-                    except Exception as e:
-                        self.log_message.emit(f"  处理图片 {Path(img_path).name} 时出错: {e}")
+                if pyvips is not None:
+                    count = self.stitch_group_vips(group_images, output_path)
+                    current_step += 2 * len(group_images) + 2
+                    self.report_progress(current_step, total_steps)
+                    if count:
+                        self.log_message.emit(f"已生成: {output_name} ({count}张图片)")
+                    continue
+                
+                # 本组的解码任务可能已在处理上一组时提前提交
+                if group_num in submitted:
+                    headers, valid_paths, target_sizes, futures = submitted.pop(group_num)
+                else:
+                    headers, valid_paths, target_sizes, futures = self.submit_group(executor, group_images)
+                
+                # 提前提交下一组的解码任务，本组拼接和保存期间线程池不会空闲
+                next_num = next((num for num in range(group_num + 1, total_groups)
+                                 if len(self.image_groups[num]) >= 2), None)
+                if next_num is not None:
+                    submitted[next_num] = self.submit_group(executor, self.image_groups[next_num])
+                
+                # 本组的日志合并为一条消息发送，减少跨线程投递到界面的事件数量
+                lines = []
+                for img_path, size_or_error in headers:
+                    lines.append(f"  加载图片: {Path(img_path).name}")
+                    if isinstance(size_or_error, Exception):
+                        lines.append(f"  处理图片 {Path(img_path).name} 时出错: {size_or_error}")
                         continue
-                    
                     current_step += 1
-                    progress = int(current_step / total_steps * 100)
-                    self.progress_updated.emit(progress)
+                self.log_message.emit("\n".join(lines))
+                self.report_progress(current_step, total_steps)
                 
-                if not pil_images:
+                if not valid_paths:
                     continue
                 
-                # 缩放图片
-                self.log_message.emit("  正在缩放图片...")
-                resized_images = []
-                total_height = 0
+                min_width = target_sizes[0][0]
                 
-                for img, path in pil_images:
-                    scale_ratio = min_width / img.width
-                    new_height = int(img.height * scale_ratio)
-                    
-                    resized_img = img.resize((min_width, new_height), Image.Resampling.LANCZOS)
-                    resized_images.append(resized_img)
-                    total_height += new_height
+                # 画布尺寸可以预先算出，直接分配一次；每张图缩放完成后立即贴到
+                # 画布上并释放，内存中不会同时保留所有缩放后的图片。
+                # 各图宽度相同、高度之和正好等于画布高度，会完整覆盖画布，
+                # 因此不初始化像素（color=None），省去一次整幅画布的填充写入
+                final_img = Image.new('RGB', (min_width, sum(h for _, h in target_sizes)), None)
+                
+                # 在线程池中并行解码和缩放，结果按原顺序返回
+                self.log_message.emit("  正在缩放并拼接图片...")
+                y_offset = 0
+                stitched_count = 0
+                
+                decoded = []  # 成功解码的图片 (路径, 原始尺寸)
+                valid_sizes = [size for _, size in headers if not isinstance(size, Exception)]
+                
+                for img_path, size, future in zip(valid_paths, valid_sizes, futures):
+                    self.check_cancelled()
+                    resized_img, error = future.result()
+                    if error is not None:
+                        self.log_message.emit(f"  处理图片 {Path(img_path).name} 时出错: {error}")
+                    else:
+                        final_img.paste(resized_img, (0, y_offset))
+                        y_offset += resized_img.height
+                        stitched_count += 1
+                        decoded.append((img_path, size))
+                        resized_img.close()
                     
                     current_step += 1
-                    progress = int(current_step / total_steps * 100)
-                    self.progress_updated.emit(progress)
+                    self.report_progress(current_step, total_steps)
                 
-                # 创建长图
-                self.log_message.emit("  正在拼接图片...")
-                final_img = Image.new('RGB', (min_width, total_height), (255, 255, 255))
+                if not stitched_count:
+                    continue
                 
-                y_offset = 0
-                for img in resized_images:
-                    final_img.paste(img, (0, y_offset))
-                    y_offset += img.height
+                self.check_cancelled()
+                if min(width for _, (width, _) in decoded) > min_width:
+                    # 文件头可以读取但解码失败的图片决定了最短横边时，按成功解码的图片
+                    # 重新计算并重新缩放，其余图片不会被缩小到出错图片的宽度
+                    final_img.close()
+                    final_img, stitched_count = self.restitch_group(executor, decoded)
+                    if not stitched_count:
+                        continue
+                elif y_offset < final_img.height:
+                    # 有图片解码失败时，后面的图片已依次上移，裁掉底部未写入的部分
+                    final_img = final_img.crop((0, 0, min_width, y_offset))
                 
                 current_step += 1
-                progress = int(current_step / total_steps * 100)
-                self.progress_updated.emit(progress)
+                self.report_progress(current_step, total_steps)
                 
-                # 保存结果
-                if total_groups == 1:
-                    output_name = "stitched_long_image.jpg"
-                else:
-                    output_name = f"stitched_long_image_part{group_num + 1}.jpg"
+                # 保存结果：最多只有一组在后台编码，先等待上一组保存完成，
+                # 避免同时在内存中保留多张长图
+                if pending_save is not None:
+                    self.wait_for_save(pending_save)
+                    current_step += 1
+                    self.report_progress(current_step, total_steps)
                 
-                output_path = self.output_dir / output_name
                 self.log_message.emit(f"  保存图片: {output_name}")
-                final_img.save(output_path, 'JPEG', quality=95)
-                
+                future = save_executor.submit(final_img.save, output_path, 'JPEG',
+                                             quality=self.quality, **JPEG_SAVE_OPTIONS)
+                pending_save = (future, output_name, stitched_count, final_img)
+                # 长图只由保存任务和pending_save引用，保存完成后立即释放
+                del final_img
+            
+            if pending_save is not None:
+                self.wait_for_save(pending_save)
+                pending_save = None
                 current_step += 1
-                progress = int(current_step / total_steps * 100)
-                self.progress_updated.emit(progress)
-                
-                self.log_message.emit(f"已生成: {output_name} ({len(resized_images)}张图片)")
+                self.report_progress(current_step, total_steps)
             
             self.finished_signal.emit(True, f"处理完成！共生成 {total_groups} 张长图")
             
+        except StitchCancelled:
+            self.finished_signal.emit(False, "用户取消操作")
         except Exception as e:
             self.finished_signal.emit(False, f"处理失败: {str(e)}")
+        finally:
+            # 取消时丢弃尚未开始的解码任务（cancel_futures需要Python 3.9+，更早的版本
+            # 等待已提交的任务执行完）；正在保存的图片会完整写完，不留下半个文件
+            if sys.version_info >= (3, 9):
+                executor.shutdown(cancel_futures=True)
+            else:
+                executor.shutdown()
+            save_executor.shutdown()
+    
+    def submit_group(self, executor, group_images):
+        """读取一组图片的文件头（不解码像素），并把解码和缩放任务提交到线程池
+        
+        Returns:
+            (文件头读取结果 [(路径, 尺寸或异常)], 有效路径, 各图缩放后的尺寸, 解码任务future列表)
+        """
+        headers = []
+        for img_path in group_images:
+            try:
+                headers.append((img_path, read_image_size(img_path)))
+            except Exception as e:
+                headers.append((img_path, e))
+        
+        valid = [(img_path, size) for img_path, size in headers if not isinstance(size, Exception)]
+        if not valid:
+            return headers, [], [], []
+        
+        valid_paths = [img_path for img_path, _ in valid]
+        target_sizes = scale_to_min_width([size for _, size in valid])
+        futures = [executor.submit(load_and_resize, img_path, size)
+                   for img_path, size in zip(valid_paths, target_sizes)]
+        return headers, valid_paths, target_sizes, futures
+    
+    def restitch_group(self, executor, images):
+        """按新的最短横边重新缩放并拼接 [(路径, 原始尺寸), ...]
+        
+        Returns:
+            (长图, 成功拼接的图片数量)
+        """
+        target_sizes = scale_to_min_width([size for _, size in images])
+        futures = [executor.submit(load_and_resize, img_path, size)
+                   for (img_path, _), size in zip(images, target_sizes)]
+        final_img = Image.new('RGB', (target_sizes[0][0], sum(h for _, h in target_sizes)), None)
+        y_offset = 0
+        stitched_count = 0
+        for (img_path, _), future in zip(images, futures):
+            self.check_cancelled()
+            resized_img, error = future.result()
+            if error is not None:
+                self.log_message.emit(f"  处理图片 {Path(img_path).name} 时出错: {error}")
+                continue
+            final_img.paste(resized_img, (0, y_offset))
+            y_offset += resized_img.height
+            stitched_count += 1
+            resized_img.close()
+        if y_offset < final_img.height:
+            final_img = final_img.crop((0, 0, final_img.width, y_offset))
+        return final_img, stitched_count
+    
+    def report_progress(self, current_step, total_steps):
+        """发出进度信号，百分比没有变化时不发送，避免向界面投递大量无用事件"""
+        progress = int(current_step / total_steps * 100)
+        if progress != self._last_progress:
+            self._last_progress = progress
+            self.progress_updated.emit(progress)
+    
+    def wait_for_save(self, pending_save):
+        """等待后台保存完成并输出日志，保存失败时抛出原异常
+        
+        无论保存是否成功都立即关闭长图，释放其像素缓冲区。
+        """
+        future, output_name, count, image = pending_save
+        try:
+            future.result()
+        finally:
+            image.close()
+        self.log_message.emit(f"已生成: {output_name} ({count}张图片)")
+    
+    def stitch_group_vips(self, group_images, output_path):
+        """使用libvips拼接一组图片，返回成功拼接的图片数量
+        
+        缩放在解码时完成（JPEG按DCT缩放加载），拼接和编码以流水线方式
+        逐块进行，不会在内存中生成完整的长图缓冲区。
+        """
+        headers = []
+        lines = []
+        for img_path in group_images:
+            try:
+                lines.append(f"  加载图片: {Path(img_path).name}")
+                headers.append((img_path, pyvips.Image.new_from_file(str(img_path))))
+            except pyvips.Error as e:
+                lines.append(f"  处理图片 {Path(img_path).name} 时出错: {e}")
+        self.log_message.emit("\n".join(lines))
+        
+        if not headers:
+            return 0
+        
+        min_width = min(header.width for _, header in headers)
+        
+        self.log_message.emit("  正在缩放图片...")
+        tiles = []
+        for img_path, _ in headers:
+            self.check_cancelled()
+            try:
+                tiles.append((img_path, self.load_tile_vips(img_path, min_width)))
+            except pyvips.Error as e:
+                self.log_message.emit(f"  处理图片 {Path(img_path).name} 时出错: {e}")
+        
+        if not tiles:
+            return 0
+        
+        self.log_message.emit(f"  保存图片: {output_path.name}")
+        try:
+            self.write_tiles_vips(tiles, output_path)
+        except pyvips.Error:
+            # 解码是惰性的，部分损坏的图片要到写出时才报错：逐张完整解码一次
+            # 找出出错的图片，跳过它们后重新写出
+            valid_tiles = []
+            for img_path, _ in tiles:
+                self.check_cancelled()
+                try:
+                    # 顺序读取的图片只能解码一遍，检查用过后需要重新加载
+                    self.load_tile_vips(img_path, min_width).avg()
+                    valid_tiles.append((img_path, self.load_tile_vips(img_path, min_width)))
+                except pyvips.Error as e:
+                    self.log_message.emit(f"  处理图片 {Path(img_path).name} 时出错: {e}")
+            if len(valid_tiles) == len(tiles):
+                raise
+            if not valid_tiles:
+                return 0
+            tiles = valid_tiles
+            self.write_tiles_vips(tiles, output_path)
+        return len(tiles)
+    
+    @staticmethod
+    def load_tile_vips(img_path, width):
+        """用libvips按指定宽度缩放一张图片（保持宽高比），透明部分合成到白色背景"""
+        tile = pyvips.Image.thumbnail(str(img_path), width, height=10000000,
+                                      no_rotate=True)
+        if tile.hasalpha():
+            tile = tile.flatten(background=[255, 255, 255])
+        if tile.interpretation != 'srgb':
+            tile = tile.colourspace('srgb')
+        return tile
+    
+    def write_tiles_vips(self, tiles, output_path):
+        """把 [(路径, 缩放后的图片), ...] 垂直拼接并流式写出为JPEG"""
+        final_img = tiles[0][1]
+        for _, tile in tiles[1:]:
+            final_img = final_img.join(tile, 'vertical', background=[255, 255, 255])
+        final_img.write_to_file(str(output_path), Q=self.quality)
 
 class DragDropLabel(QLabel):
     """支持拖拽的自定义标签"""
@@ -379,11 +1184,31 @@ class DragDropLabel(QLabel):
 
 class ImageStitcherGUI(QMainWindow):
     """主窗口类"""
+    # 后台清空输出目录完成时发出 (删除数量, 删除失败的异常列表, 整体失败的异常或None)
+    clear_finished = pyqtSignal(int, list, object)
+    
     def __init__(self):
         super().__init__()
+        self.clear_finished.connect(self.on_clear_finished)
         self.input_dir = ""
         self.output_dir = ""
         self.thread = None
+        self._pool_sort_task = None
+        # 后台清空输出目录期间不允许开始拼图，避免新生成的长图被删除
+        self._clearing = False
+        # 当前包含图片的分组
+        self._non_empty_groups = set()
+        
+        # 防抖定时器：短时间内的多次调用合并为一次（拖拽、连续调整分组大小时）
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(50)
+        self._update_timer.timeout.connect(self._do_update_total_images)
+        
+        self._regroup_timer = QTimer(self)
+        self._regroup_timer.setSingleShot(True)
+        self._regroup_timer.setInterval(150)
+        self._regroup_timer.timeout.connect(self.auto_group_images)
         
         self.init_ui()
         
@@ -486,13 +1311,18 @@ class ImageStitcherGUI(QMainWindow):
         left_layout.addLayout(pool_sort_layout)
         
         self.image_pool = QListWidget()
-        self.image_pool.setIconSize(QSize(60, 60))
+        self.image_pool.setIconSize(QSize(POOL_THUMBNAIL_SIZE, POOL_THUMBNAIL_SIZE))
         self.image_pool.setStyleSheet("QListWidget::item { height: 70px; }")
         self.image_pool.setDragEnabled(True)
         self.image_pool.setDefaultDropAction(Qt.MoveAction)
         self.image_pool.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.image_pool.setFixedHeight(150)
+        # 所有项高度相同：统一尺寸免去逐项计算大小，分批布局让大量图片加入时界面不卡顿
+        self.image_pool.setUniformItemSizes(True)
+        self.image_pool.setLayoutMode(QListView.Batched)
+        self.image_pool.setBatchSize(200)
         left_layout.addWidget(self.image_pool)
+        self.pool_thumbnail_loader = ThumbnailLoader(self.image_pool, POOL_THUMBNAIL_SIZE)
         
         splitter.addWidget(left_widget)
         
@@ -532,6 +1362,14 @@ class ImageStitcherGUI(QMainWindow):
         self.output_btn.clicked.connect(self.select_output_dir)
         params_layout.addWidget(self.output_btn, 1, 2)
         
+        # 输出质量：数值越低编码越快、文件越小
+        params_layout.addWidget(QLabel("输出质量:"), 2, 0)
+        self.quality_spinbox = QSpinBox()
+        self.quality_spinbox.setRange(50, 100)
+        self.quality_spinbox.setValue(OUTPUT_QUALITY)
+        self.quality_spinbox.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        params_layout.addWidget(self.quality_spinbox, 2, 1)
+        
         right_layout.addWidget(params_group)
         
         # 拖拽区域
@@ -662,53 +1500,52 @@ class ImageStitcherGUI(QMainWindow):
             self.update_total_images()
             return
             
-        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp'}
-        input_path = Path(self.input_dir)
+        image_extensions = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp')
         
-        images = []
-        for file in input_path.iterdir():
-            if file.suffix.lower() in image_extensions:
-                images.append(file)
+        # scandir的目录项自带文件名、完整路径和类型信息，无需为每个文件创建Path对象
+        with os.scandir(self.input_dir) as it:
+            images = [entry for entry in it
+                      if entry.name.lower().endswith(image_extensions) and entry.is_file()]
         
-        images.sort(key=lambda x: x.name)
+        images.sort(key=lambda entry: entry.name)
         
-        for img_path in images:
-            item = QListWidgetItem()
-            item.setText(img_path.name)
-            item.setData(Qt.UserRole, str(img_path))
+        self.add_images_to_pool([entry.path for entry in images],
+                                [entry.name for entry in images])
             
-            # 创建缩略图
-            try:
-                pixmap = QPixmap(str(img_path))
-                if not pixmap.isNull():
-                    scaled = pixmap.scaled(60, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    item.setIcon(QIcon(scaled))
-            except Exception:
-                pass
-                
-            self.image_pool.addItem(item)
-            
-        self.image_pool.setIconSize(QSize(60, 60))
+        self.image_pool.setIconSize(QSize(POOL_THUMBNAIL_SIZE, POOL_THUMBNAIL_SIZE))
         self.update_total_images()
         self.log_message(f"已加载 {len(images)} 张图片到未分组池")
 
+    def add_images_to_pool(self, image_paths, names=None):
+        """把图片添加到未分组池（缩略图由ThumbnailLoader按需生成）
+        
+        Args:
+            image_paths: 图片路径列表
+            names: 对应的文件名列表，调用方已知时传入可省去逐个计算basename
+        """
+        if names is None:
+            names = list(map(os.path.basename, image_paths))
+        # addItems一次插入所有行，只触发一次行插入信号和布局更新
+        image_pool = self.image_pool
+        start = image_pool.count()
+        image_pool.addItems(names)
+        for row, img_path in enumerate(image_paths, start):
+            image_pool.item(row).setData(Qt.UserRole, img_path)
+    
     def update_total_images(self):
+        """请求更新总图片数量显示，50毫秒内的多次请求只执行一次"""
+        self._update_timer.start()
+    
+    def _do_update_total_images(self):
         """更新总图片数量显示（显示预期输出长图数量）"""
-        total_output_images = 0
-        
         # 计算分组中的输出图片数量（每个有效分组输出1张长图）
-        for i in range(self.groups_layout.count()):
-            item = self.groups_layout.itemAt(i)
-            if item and isinstance(item.widget(), GroupWidget):
-                widget = item.widget()
-                if widget.get_images():
-                    total_output_images += 1
+        total_output_images = len(self._non_empty_groups)
         
         self.total_images_label.setText(f"共 {total_output_images} 张输出图片")
 
     def on_group_size_changed(self, new_value):
-        """处理分组大小变化"""
-        self.auto_group_images()
+        """处理分组大小变化（防抖：停止调整150毫秒后才重新分组）"""
+        self._regroup_timer.start()
 
     def sort_unassigned_images(self, sort_by='name'):
         """对未分组图片进行排序（带进度条）
@@ -726,81 +1563,20 @@ class ImageStitcherGUI(QMainWindow):
         progress.setValue(0)
         progress.show()
         
-        try:
-            # 获取所有未分组图片路径
-            image_paths = []
-            for i in range(self.image_pool.count()):
-                item = self.image_pool.item(i)
-                if item:
-                    img_path = item.data(Qt.UserRole)
-                    image_paths.append(img_path)
-            
-            if not image_paths:
-                progress.close()
-                return
-                
-            total_images = len(image_paths)
-            progress.setMaximum(total_images)
-            
-            # 获取图片信息并排序
-            image_info = []
-            for idx, img_path in enumerate(image_paths):
-                if progress.wasCanceled():
-                    progress.close()
-                    return
-                    
-                try:
-                    stat = os.stat(img_path)
-                    info = {
-                        'path': img_path,
-                        'name': os.path.basename(img_path),
-                        'size': stat.st_size,
-                        'mtime': stat.st_mtime
-                    }
-                    image_info.append(info)
-                except (OSError, IOError):
-                    image_info.append({
-                        'path': img_path,
-                        'name': os.path.basename(img_path),
-                        'size': 0,
-                        'mtime': 0
-                    })
-                
-                progress.setValue(idx + 1)
-                QApplication.processEvents()
-            
-            # 根据排序方式进行排序
-            if sort_by == 'name':
-                image_info.sort(key=lambda x: x['name'].lower())
-            elif sort_by == 'size':
-                image_info.sort(key=lambda x: x['size'], reverse=True)
-            elif sort_by == 'time':
-                image_info.sort(key=lambda x: x['mtime'], reverse=True)
-            
-            # 清空并重新创建项目
-            self.image_pool.clear()
-            for info in image_info:
-                item = QListWidgetItem()
-                item.setText(info['name'])
-                item.setData(Qt.UserRole, info['path'])
-                
-                # 添加缩略图
-                try:
-                    pixmap = QPixmap(info['path'])
-                    if not pixmap.isNull():
-                        scaled = pixmap.scaled(60, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        item.setIcon(QIcon(scaled))
-                except Exception:
-                    pass
-                    
-                self.image_pool.addItem(item)
-            
-            progress.close()
+        self._pool_sort_task = ImageSortTask(self.image_pool, sort_by, progress)
+        self._pool_sort_task.finished.connect(
+            lambda success, error: self.on_pool_sort_finished(sort_by, success, error))
+        self._pool_sort_task.start()
+    
+    def on_pool_sort_finished(self, sort_by, success, error):
+        """未分组图片排序完成"""
+        self._pool_sort_task.deleteLater()
+        self._pool_sort_task = None
+        
+        if success:
             self.log_message(f"未分组图片已按{sort_by}排序")
-            
-        except Exception as e:
-            progress.close()
-            self.log_message(f"排序失败: {e}")
+        elif error:
+            self.log_message(f"排序失败: {error}")
 
     def auto_group_images(self):
         """根据设定的每组图片数量自动分组（带进度条）"""
@@ -812,20 +1588,23 @@ class ImageStitcherGUI(QMainWindow):
         progress.show()
         
         try:
-            # 收集所有图片（包括已分组的和未分组的）
-            all_images = []
-            
-            # 收集未分组池中的图片
-            for i in range(self.image_pool.count()):
-                item = self.image_pool.item(i)
-                all_images.append(item.data(Qt.UserRole))
-            
-            # 收集所有分组中的图片
+            # 收集所有图片（包括未分组的和已分组的），一次性拼接成一个列表。
+            # 已分组图片的列表项直接从旧分组中取出复用，保留已生成的缩略图，
+            # 只调整分组大小时无需重新创建列表项和加载缩略图
+            pool_images = [self.image_pool.item(i).data(Qt.UserRole)
+                           for i in range(self.image_pool.count())]
+            group_items = []
             for i in range(self.groups_layout.count()):
                 group_widget = self.groups_layout.itemAt(i).widget()
                 if isinstance(group_widget, GroupWidget):
-                    group_images = group_widget.get_images()
-                    all_images.extend(group_images)
+                    group_items.extend(group_widget.take_items())
+            all_images = list(itertools.chain(
+                pool_images, (item.data(Qt.UserRole) for item in group_items)))
+            # 未分组池的缩略图尺寸与分组不同，这些图片仍需新建列表项
+            all_items = [None] * len(pool_images) + group_items
+            
+            # 重建期间暂停分组区域的重绘，全部分组创建完后统一布局和绘制一次
+            self.groups_scroll.setUpdatesEnabled(False)
             
             # 清空现有分组和未分组池
             self.clear_all_groups()
@@ -839,63 +1618,51 @@ class ImageStitcherGUI(QMainWindow):
             total_images = len(all_images)
             progress.setMaximum(total_images)
             
-            # 将所有图片重新放入未分组池
-            for idx, img_path in enumerate(all_images):
-                if progress.wasCanceled():
-                    progress.close()
-                    return
-                    
-                item = QListWidgetItem()
-                item.setText(os.path.basename(img_path))
-                item.setData(Qt.UserRole, img_path)
-                
-                # 添加缩略图
-                try:
-                    pixmap = QPixmap(img_path)
-                    if not pixmap.isNull():
-                        scaled = pixmap.scaled(60, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                        item.setIcon(QIcon(scaled))
-                except Exception:
-                    pass
-                    
-                self.image_pool.addItem(item)
-                progress.setValue(idx + 1)
-                QApplication.processEvents()
-            
-            # 重新进行自动分组
+            # 直接按顺序切分为各个分组，不再先放回未分组池再移出
             group_size = self.group_size_spinbox.value()
             total_groups = (total_images + group_size - 1) // group_size
             
             # 计算最佳列数
             cols = max(2, min(4, (total_groups + 1) // 2))
             
-            # 创建分组
+            # 先创建全部分组组件，最后一次性加入网格布局
+            group_widgets = []
+            shown_progress = 0
+            canceled = False
             for i in range(total_groups):
+                start_idx = i * group_size
                 if progress.wasCanceled():
-                    progress.close()
-                    return
+                    # 取消时把尚未分组的图片放回未分组池，避免丢失
+                    self.add_images_to_pool(all_images[start_idx:])
+                    canceled = True
+                    break
                     
-                start_idx = i * group_size
                 end_idx = min(start_idx + group_size, total_images)
                 group_images = all_images[start_idx:end_idx]
                 
-                group_widget = GroupWidget(f"分组 {i+1}")
-                for img_path in group_images:
-                    group_widget.add_image(img_path)
+                group_widget = self.create_group(f"分组 {i+1}")
+                # 来自未分组池的图片排在前面，批量新建列表项；其余直接移入已有列表项
+                items = all_items[start_idx:end_idx]
+                new_count = sum(item is None for item in items)
+                if new_count:
+                    group_widget.add_images(group_images[:new_count])
+                for item in items[new_count:]:
+                    group_widget.add_item(item)
+                group_widgets.append(group_widget)
                 
-                row = i // cols
-                col = i % cols
-                self.groups_layout.addWidget(group_widget, row, col)
-                
-                # 更新进度
-                progress.setValue(int((i + 1) / total_groups * total_images))
-                QApplication.processEvents()
+                # 更新进度（模态进度对话框在setValue时会自行处理事件），
+                # 每处理PROGRESS_BATCH张图片才刷新一次
+                if end_idx - shown_progress >= PROGRESS_BATCH or end_idx == total_images:
+                    progress.setValue(end_idx)
+                    shown_progress = end_idx
             
-            # 从未分组池中移除已分组的图片
-            for i in range(self.image_pool.count() - 1, -1, -1):
-                item = self.image_pool.item(i)
-                if item and item.data(Qt.UserRole) in all_images[:total_groups * group_size]:
-                    self.image_pool.takeItem(i)
+            for i, group_widget in enumerate(group_widgets):
+                self.groups_layout.addWidget(group_widget, i // cols, i % cols)
+            
+            if canceled:
+                progress.close()
+                self.update_total_images()
+                return
             
             progress.close()
             self.update_total_images()
@@ -905,20 +1672,42 @@ class ImageStitcherGUI(QMainWindow):
         except Exception as e:
             progress.close()
             self.log_message(f"分组失败: {e}")
+        finally:
+            self.groups_scroll.setUpdatesEnabled(True)
 
     def clear_all_groups(self):
         """清空所有分组"""
         while self.groups_layout.count():
             child = self.groups_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+            widget = child.widget()
+            if widget:
+                if isinstance(widget, GroupWidget):
+                    # 销毁过程中列表模型不再发出信号，避免回调到正在销毁的分组
+                    widget.image_list.model().blockSignals(True)
+                widget.deleteLater()
+        self._non_empty_groups.clear()
         self.update_total_images()
         self.check_start_button()
 
+    def create_group(self, group_name):
+        """创建分组组件，并跟踪其是否为空"""
+        group_widget = GroupWidget(group_name)
+        group_widget.non_empty_changed.connect(self.on_group_non_empty_changed)
+        return group_widget
+    
+    def on_group_non_empty_changed(self, group_widget, non_empty):
+        """维护非空分组集合，开始按钮和输出数量直接据此更新，无需遍历所有分组"""
+        if non_empty:
+            self._non_empty_groups.add(group_widget)
+        else:
+            self._non_empty_groups.discard(group_widget)
+        self.update_total_images()
+        self.check_start_button()
+    
     def add_empty_group(self):
         """添加空分组"""
         group_name = f"分组 {self.groups_layout.count() + 1}"
-        group_widget = GroupWidget(group_name)
+        group_widget = self.create_group(group_name)
         
         # 计算网格位置
         count = self.groups_layout.count()
@@ -951,12 +1740,13 @@ class ImageStitcherGUI(QMainWindow):
         self.progress_bar.setValue(0)
         self.log_text.clear()
         
-        # 禁用按钮
+        # 禁用按钮（拼图期间不允许清空输出目录）
         self.start_btn.setEnabled(False)
+        self.clear_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         
         # 启动线程
-        self.thread = ImageStitcherThread(self.output_dir, groups)
+        self.thread = ImageStitcherThread(self.output_dir, groups, self.quality_spinbox.value())
         self.thread.progress_updated.connect(self.update_progress)
         self.thread.log_message.connect(self.log_message)
         self.thread.finished_signal.connect(self.stitching_finished)
@@ -1000,38 +1790,37 @@ class ImageStitcherGUI(QMainWindow):
             self.load_images_to_pool()
         else:
             # 处理拖拽的文件
-            for file_path in files:
-                if os.path.isfile(file_path):
-                    item = QListWidgetItem()
-                    item.setText(os.path.basename(file_path))
-                    item.setData(Qt.UserRole, file_path)
-                    
-                    try:
-                        pixmap = QPixmap(file_path)
-                        if not pixmap.isNull():
-                            scaled = pixmap.scaled(60, 60, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                            item.setIcon(QIcon(scaled))
-                    except Exception:
-                        pass
-                        
-                    self.image_pool.addItem(item)
+            self.add_images_to_pool([file_path for file_path in files if os.path.isfile(file_path)])
         
         self.check_start_button()
 
     def check_start_button(self):
         """检查开始按钮状态"""
-        has_groups = len(self.get_all_groups()) > 0
-        self.start_btn.setEnabled(has_groups)
+        self.start_btn.setEnabled(bool(self._non_empty_groups) and not self._clearing)
 
 
     
 
     
     def stop_stitching(self):
-        """停止处理"""
+        """停止处理
+        
+        先请求线程在处理完当前图片后自行退出（完成后通过finished_signal回调），
+        超时仍未退出时才强制终止。
+        """
         if self.thread and self.thread.isRunning():
-            self.thread.terminate()
-            self.thread.wait()
+            thread = self.thread
+            thread.request_cancel()
+            self.stop_btn.setEnabled(False)
+            self.log_message("正在停止...")
+            QTimer.singleShot(STOP_TIMEOUT_MS, lambda: self.force_stop_thread(thread))
+    
+    def force_stop_thread(self, thread):
+        """线程在超时时间内未响应取消请求时强制终止"""
+        if thread is self.thread and thread.isRunning():
+            thread.finished_signal.disconnect()
+            thread.terminate()
+            thread.wait()
             self.stitching_finished(False, "用户取消操作")
     
     def update_progress(self, value):
@@ -1047,6 +1836,7 @@ class ImageStitcherGUI(QMainWindow):
         """处理完成回调"""
         self.progress_bar.setVisible(False)
         self.start_btn.setEnabled(True)
+        self.clear_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self.input_btn.setEnabled(True)
         self.output_btn.setEnabled(True)
@@ -1055,7 +1845,8 @@ class ImageStitcherGUI(QMainWindow):
             QMessageBox.information(self, "完成", message)
             # 打开输出目录
             if self.output_dir:
-                os.startfile(self.output_dir)
+                output_dir = self.output_dir
+                QTimer.singleShot(0, lambda: open_in_file_manager(output_dir))
         else:
             QMessageBox.warning(self, "错误", message)
     
@@ -1070,33 +1861,38 @@ class ImageStitcherGUI(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No)
         
         if reply == QMessageBox.Yes:
-            import shutil
-            try:
-                deleted_count = 0
-                for item in os.listdir(self.output_dir):
-                    if item == '.gitkeep':
-                        continue  # 跳过.gitkeep文件
-                    
-                    item_path = os.path.join(self.output_dir, item)
-                    if os.path.isfile(item_path):
-                        os.unlink(item_path)
-                        deleted_count += 1
-                    elif os.path.isdir(item_path):
-                        shutil.rmtree(item_path)
-                        deleted_count += 1
-                
-                QMessageBox.information(self, "完成", f"输出目录已清空，共删除 {deleted_count} 个项目")
-            except Exception as e:
-                QMessageBox.warning(self, "错误", f"清空失败: {str(e)}")
+            # 删除大量文件可能耗时较长，放到后台线程执行，界面保持响应
+            self._clearing = True
+            self.clear_btn.setEnabled(False)
+            self.start_btn.setEnabled(False)
+            self.log_message(f"正在清空输出目录: {self.output_dir}")
+            QThreadPool.globalInstance().start(ClearDirectoryJob(self.output_dir, self.clear_finished))
+    
+    def on_clear_finished(self, deleted_count, errors, failure):
+        """清空输出目录完成"""
+        self._clearing = False
+        self.clear_btn.setEnabled(True)
+        self.check_start_button()
+        if failure is not None:
+            QMessageBox.warning(self, "错误", f"清空失败: {str(failure)}")
+        elif errors:
+            QMessageBox.warning(self, "错误",
+                                f"已删除 {deleted_count} 个项目，{len(errors)} 个项目删除失败: {errors[0]}")
+        else:
+            self.log_message(f"输出目录已清空，共删除 {deleted_count} 个项目")
+            QMessageBox.information(self, "完成", f"输出目录已清空，共删除 {deleted_count} 个项目")
 
 def main():
     """主函数"""
+    # 图标按设备像素比使用高分辨率缩略图
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
     app = QApplication(sys.argv)
     
     # 设置应用信息
     app.setApplicationName("MomentStitcher")
     app.setApplicationVersion(__version__)
     app.setStyle('Fusion')
+    QPixmapCache.setCacheLimit(THUMBNAIL_MEMORY_LIMIT_KB)
     
     window = ImageStitcherGUI()
     window.show()
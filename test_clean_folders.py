@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试脚本 - 验证文件夹清理工具
+"""
+
+import os
+
+import pytest
+
+import clean_folders
+
+def test_recursive_keeps_symlinks(tmp_path, monkeypatch):
+    """递归清空与非递归模式一致：只删除普通文件，保留符号链接"""
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "input"
+    (folder / "sub").mkdir(parents=True)
+    (folder / "a.jpg").write_bytes(b"a")
+    (folder / "sub" / "b.jpg").write_bytes(b"b")
+    (folder / ".gitkeep").write_bytes(b"")
+    target = tmp_path / "target.txt"
+    target.write_text("keep")
+    os.symlink(target, folder / "link")
+    os.symlink(target, folder / "sub" / "link")
+    
+    assert clean_folders.clear_folder("input", "input", recursive=True, assume_yes=True)
+    
+    assert sorted(os.listdir(folder)) == [".gitkeep", "link", "sub"]
+    assert os.listdir(folder / "sub") == ["link"]
+    assert target.read_text() == "keep"
+
+def _make_tree(folder):
+    """创建包含文件、子文件夹、.git和符号链接的测试目录"""
+    (folder / "sub").mkdir(parents=True)
+    (folder / ".git").mkdir()
+    for name in ("b.jpg", "a.jpg", ".gitkeep"):
+        (folder / name).write_bytes(b"x")
+    os.symlink(folder / "a.jpg", folder / "link")
+    os.symlink(folder / "sub", folder / "dirlink")
+
+def test_getdents_matches_scandir(tmp_path):
+    """getdents64解析出的文件名、inode和类型与os.scandir一致"""
+    _make_tree(tmp_path)
+    dents = clean_folders._getdents(str(tmp_path))
+    if dents is None:
+        pytest.skip("当前平台不支持getdents64")
+    
+    expected = set()
+    with os.scandir(tmp_path) as it:
+        for e in it:
+            if e.is_symlink():
+                d_type = 10  # DT_LNK
+            elif e.is_dir():
+                d_type = clean_folders._DT_DIR
+            else:
+                d_type = clean_folders._DT_REG
+            expected.add((e.inode(), e.name, d_type))
+    # 部分文件系统不提供d_type（DT_UNKNOWN），此时只比较inode和文件名
+    if any(d_type == clean_folders._DT_UNKNOWN for _, _, d_type in dents):
+        expected = {(ino, name) for ino, name, _ in expected}
+        dents = [(ino, name) for ino, name, _ in dents]
+    assert len(dents) == len(expected)
+    assert set(dents) == expected
+
+def test_scan_folder_paths_agree(tmp_path, monkeypatch):
+    """getdents快速路径、DT_UNKNOWN回退和os.scandir通用路径的扫描结果一致"""
+    _make_tree(tmp_path)
+    folder = str(tmp_path)
+    fast = clean_folders._scan_folder(folder, recursive=True)
+    
+    # 模拟不提供d_type的文件系统，并包含一个读取目录后被删除的文件
+    entries = [(e.inode(), e.name, clean_folders._DT_UNKNOWN) for e in os.scandir(folder)]
+    entries.append((0, "vanished.jpg", clean_folders._DT_UNKNOWN))
+    monkeypatch.setattr(clean_folders, "_getdents", lambda path: list(entries))
+    unknown = clean_folders._scan_folder(folder, recursive=True)
+    
+    monkeypatch.setattr(clean_folders, "_getdents", lambda path: None)
+    generic = clean_folders._scan_folder(folder, recursive=True)
+    
+    for files, subdirs in (fast, unknown, generic):
+        assert sorted(files) == [("a.jpg", os.path.join(folder, "a.jpg")),
+                                 ("b.jpg", os.path.join(folder, "b.jpg"))]
+        assert subdirs == ["sub"]
+
+def test_refuses_folders_outside_cwd(tmp_path, monkeypatch):
+    """拒绝清空当前工作目录本身、其上级目录以及指向外部的符号链接"""
+    work = tmp_path / "work"
+    (work / "input").mkdir(parents=True)
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "keep.jpg").write_bytes(b"x")
+    (work / "keep.jpg").write_bytes(b"x")
+    os.symlink(outside, work / "escape")
+    monkeypatch.chdir(work)
+    
+    for folder in ("..", "../..", ".", str(work), "escape", str(outside)):
+        assert not clean_folders.clear_folder(folder, folder, assume_yes=True), folder
+    assert (outside / "keep.jpg").exists()
+    assert (work / "keep.jpg").exists()
+
+def test_accepts_subfolder_when_cwd_is_root(monkeypatch, tmp_path):
+    """当前工作目录为根目录时，其下的文件夹仍可以清空"""
+    (tmp_path / "a.jpg").write_bytes(b"x")
+    monkeypatch.chdir(os.path.abspath(os.sep))
+    relative = os.path.relpath(tmp_path, os.path.abspath(os.sep))
+    
+    assert clean_folders.clear_folder(relative, "tmp", assume_yes=True)
+    assert not (tmp_path / "a.jpg").exists()
+
+def test_clear_both_output_grouped_by_folder(tmp_path, monkeypatch, capsys):
+    """并行清空两个文件夹时，输出按文件夹整段打印并带有各自的标题"""
+    monkeypatch.chdir(tmp_path)
+    for name in ("input", "output"):
+        (tmp_path / name).mkdir()
+        for i in range(20):
+            (tmp_path / name / f"{name}_{i:02d}.jpg").write_bytes(b"x")
+    
+    assert clean_folders.clear_input_and_output(assume_yes=True)
+    
+    out = capsys.readouterr().out
+    input_part, output_part = out.split("--- 清空output文件夹 ---")
+    assert "--- 清空input文件夹 ---" in input_part
+    assert "input_19.jpg" in input_part and "output_" not in input_part
+    assert "output_19.jpg" in output_part and "input_" not in output_part
+
+def test_getdents_failure_falls_back(tmp_path, monkeypatch):
+    """系统调用失败（如号码不可用）或架构未知时返回None，扫描回退到os.scandir"""
+    _make_tree(tmp_path)
+    expected = clean_folders._scan_folder(str(tmp_path), recursive=True)
+    
+    invalid = {key: 100000 for key in clean_folders._SYS_GETDENTS64}  # ENOSYS
+    monkeypatch.setattr(clean_folders, "_SYS_GETDENTS64", invalid)
+    assert clean_folders._getdents(str(tmp_path)) is None
+    assert clean_folders._scan_folder(str(tmp_path), recursive=True) == expected
+    
+    monkeypatch.setattr(clean_folders.platform, "machine", lambda: "mips")
+    assert clean_folders._getdents(str(tmp_path)) is None
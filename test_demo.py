@@ -25,6 +25,9 @@ def create_test_images():
         (100, 200, 255),   # 天蓝
     ]
     
+    # 默认字体只加载一次，所有图片共用
+    font = ImageFont.load_default()
+    
     for i, color in enumerate(colors, 1):
         # 创建不同尺寸的图片
         width = 400 + (i % 3) * 100  # 400-600像素宽度
@@ -33,18 +36,14 @@ def create_test_images():
         img = Image.new('RGB', (width, height), color)
         draw = ImageDraw.Draw(img)
         
-        # 添加文字
-        try:
-            font = ImageFont.load_default()
-            text = f"Test {i}"
-            text_bbox = draw.textbbox((0, 0), text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            text_x = (width - text_width) // 2
-            text_y = (height - text_height) // 2
-            draw.text((text_x, text_y), text, fill=(255, 255, 255), font=font)
-        except:
-            draw.text((width//2-30, height//2), f"Test {i}", fill=(255, 255, 255))
+        # 添加文字（ImageDraw.textbbox自Pillow 8.0起可用，位图字体和TrueType字体都支持）
+        text = f"Test {i}"
+        text_bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = text_bbox[2] - text_bbox[0]
+        text_height = text_bbox[3] - text_bbox[1]
+        text_x = (width - text_width) // 2
+        text_y = (height - text_height) // 2
+        draw.text((text_x, text_y), text, fill=(255, 255, 255), font=font)
         
         img.save(f"{input_dir}/test_{i:02d}.jpg", 'JPEG', quality=95)
         print(f"已创建: test_{i:02d}.jpg ({width}x{height})")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试脚本 - 验证不解码像素的图片尺寸读取
+"""
+
+from PIL import Image
+
+from gui_stitcher import probe_image_size, read_image_size
+
+def _pillow_size(path):
+    with Image.open(path) as img:
+        return img.size
+
+def _save(tmp_path, name, size=(123, 45), **options):
+    path = tmp_path / name
+    Image.new('RGB', size, (200, 100, 50)).save(path, **options)
+    return path
+
+def test_probe_matches_pillow(tmp_path):
+    """基线、渐进式、带EXIF(APP1)的JPEG和PNG的尺寸与Pillow读取的一致"""
+    exif = Image.Exif()
+    exif[0x010F] = "MomentStitcher"  # Make
+    paths = [
+        _save(tmp_path, "baseline.jpg"),
+        _save(tmp_path, "progressive.jpg", size=(640, 480), progressive=True),
+        _save(tmp_path, "exif.jpg", size=(50, 300), exif=exif.tobytes()),
+        _save(tmp_path, "image.png", size=(7, 9)),
+    ]
+    for path in paths:
+        assert probe_image_size(path) == _pillow_size(path), path.name
+
+def test_probe_skips_fill_bytes(tmp_path):
+    """标记前的0xFF填充字节被跳过"""
+    data = _save(tmp_path, "plain.jpg").read_bytes()
+    path = tmp_path / "filled.jpg"
+    path.write_bytes(data[:2] + b'\xff\xff\xff' + data[2:])
+    assert probe_image_size(path) == _pillow_size(path) == (123, 45)
+
+def test_probe_truncated(tmp_path):
+    """截断的JPEG和PNG返回None而不是抛出异常"""
+    jpeg = _save(tmp_path, "full.jpg").read_bytes()
+    sof = jpeg.index(b'\xff\xc0')
+    png = _save(tmp_path, "full.png", format='PNG').read_bytes()
+    cases = {
+        "soi_only.jpg": jpeg[:2],
+        "before_sof.jpg": jpeg[:sof],
+        "inside_sof.jpg": jpeg[:sof + 5],
+        "signature_only.png": png[:8],
+        "inside_ihdr.png": png[:20],
+    }
+    for name, data in cases.items():
+        path = tmp_path / name
+        path.write_bytes(data)
+        assert probe_image_size(path) is None, name
+
+def test_other_formats_fall_back_to_pillow(tmp_path):
+    """JPEG/PNG以外的格式由Pillow读取文件头"""
+    for name in ("image.bmp", "image.gif", "image.webp"):
+        path = _save(tmp_path, name, size=(31, 17))
+        assert probe_image_size(path) is None
+        assert read_image_size(path) == (31, 17)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试脚本 - 验证命令行版本的分组拼接
+"""
+
+from PIL import Image
+
+import image_stitcher
+
+def _truncated_jpeg(path, size):
+    """文件头完整、像素数据被截断的JPEG：可以读取尺寸，但解码失败"""
+    Image.effect_noise(size, 64).convert('RGB').save(path, 'JPEG')
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) // 3])
+
+def _make_inputs(folder):
+    folder.mkdir()
+    # 组1：RGB JPEG、半透明RGBA PNG、截断的JPEG（不是最窄的，拼接后裁掉空白）
+    Image.new('RGB', (400, 300), (200, 30, 30)).save(folder / "a_rgb.jpg")
+    Image.new('RGBA', (600, 200), (0, 0, 255, 128)).save(folder / "b_rgba.png")
+    _truncated_jpeg(folder / "c_truncated.jpg", (800, 800))
+    # 组2：P模式PNG、RGB JPEG、无法识别的文件
+    Image.new('P', (200, 100), 3).save(folder / "d_palette.png")
+    Image.new('RGB', (500, 250), (30, 200, 30)).save(folder / "e_rgb.jpg")
+    (folder / "f_broken.jpg").write_bytes(b"not an image")
+    # 组3：最窄的图片解码失败，按其余图片重新计算最短横边
+    _truncated_jpeg(folder / "g_truncated.jpg", (100, 100))
+    Image.new('RGB', (300, 150), (30, 30, 200)).save(folder / "h_rgb.jpg")
+    Image.new('RGBA', (600, 300), (255, 255, 0, 255)).save(folder / "i_opaque.png")
+
+def _run(input_dir, output_dir):
+    image_stitcher.ImageStitcher(input_dir, output_dir).stitch_images(images_per_group=3)
+    return {path.name: path.read_bytes() for path in sorted(output_dir.iterdir())}
+
+def test_stitch_groups(tmp_path, monkeypatch):
+    """各组的输出尺寸、解码失败后的裁剪，以及多进程与单进程结果逐字节一致"""
+    input_dir = tmp_path / "input"
+    _make_inputs(input_dir)
+    
+    monkeypatch.setattr(image_stitcher.os, "cpu_count", lambda: 1)
+    sequential = _run(input_dir, tmp_path / "sequential")
+    monkeypatch.setattr(image_stitcher.os, "cpu_count", lambda: 4)
+    pooled = _run(input_dir, tmp_path / "pooled")
+    
+    sizes = {}
+    for name in sequential:
+        with Image.open(tmp_path / "sequential" / name) as img:
+            sizes[name] = img.size
+    assert sizes == {
+        "stitched_long_image_part1.jpg": (400, 300 + 133),
+        "stitched_long_image_part2.jpg": (200, 100 + 100),
+        "stitched_long_image_part3.jpg": (300, 150 + 150),
+    }
+    assert pooled == sequential
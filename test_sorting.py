@@ -48,6 +48,14 @@ def test_sorting_functionality():
         # 模拟排序逻辑
         print("测试组内排序功能...")
         
+        # 与界面中的排序相同：通过os.scandir的目录项一次性读取每个文件的stat信息，
+        # 排序和输出都使用这份结果，不再为每个文件反复调用getsize/getmtime
+        stats = {}
+        with os.scandir(test_dir) as it:
+            for entry in it:
+                st = entry.stat()
+                stats[entry.path] = (st.st_size, st.st_mtime_ns)
+        
         # 测试按名称排序
         files_by_name = sorted(test_files, key=lambda x: os.path.basename(x).lower())
         print(f"\n按名称排序:")
@@ -55,17 +63,17 @@ def test_sorting_functionality():
             print(f"  {i+1}. {os.path.basename(file_path)}")
         
         # 测试按大小排序
-        files_by_size = sorted(test_files, key=lambda x: os.path.getsize(x), reverse=True)
+        files_by_size = sorted(test_files, key=lambda x: stats[x][0], reverse=True)
         print(f"\n按大小排序:")
         for i, file_path in enumerate(files_by_size):
-            size = os.path.getsize(file_path)
+            size = stats[file_path][0]
             print(f"  {i+1}. {os.path.basename(file_path)} ({size} bytes)")
         
         # 测试按时间排序
-        files_by_time = sorted(test_files, key=lambda x: os.path.getmtime(x), reverse=True)
+        files_by_time = sorted(test_files, key=lambda x: stats[x][1], reverse=True)
         print(f"\n按时间排序:")
         for i, file_path in enumerate(files_by_time):
-            mtime = os.path.getmtime(file_path)
+            mtime = stats[file_path][1] / 1e9
             print(f"  {i+1}. {os.path.basename(file_path)} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mtime))})")
         
         print(f"\n✅ 组内排序功能逻辑测试完成！")